@@ -1,75 +1,155 @@
 # -*- coding: utf-8 -*-
-from .classes import EmptyContextManager, TupleEnum
-from .data_types import JSONEncoder, bytes_to_str, format_json, get_data, merge_dicts, normalize, quantize
-from .decorators import catches, mutes
-from .schemas import get_offset_and_limit, get_start_and_end_time
-from .shortcuts import (
-    date_to_str,
-    datetime_combine,
-    datetime_to_str,
-    get_uid,
-    identity,
-    list_first,
-    list_get,
-    log_error,
-    mock_lambda,
-    str_to_date,
-    str_to_datetime,
-    tomorrow,
-    yesterday,
-)
-from .unittest import TestCaseMixin, disable_elastic_apm, disable_migration, disable_network, fake_time, mock_redis_lock
-from .validators import is_chinese_phone, is_int, is_phone, is_singapore_phone, is_telephone, is_uuid
+#
+# 所有公开的名字都是按需加载的 (PEP 562)，import hutils 本身不会引入 django/bson 等依赖
+import importlib
+import sys
+from importlib.util import find_spec
 
 __version__ = "1.0.21"
 
 __all__ = [
+    "Clock",
+    "DataGetter",
     "EmptyContextManager",
+    "ErrorRateLimiter",
     "JSONEncoder",
+    "LocalCache",
+    "PHONE_RULES",
     "TestCaseMixin",
     "TupleEnum",
+    "TupleFieldsMixin",
     "bytes_to_str",
     "catches",
     "date_to_str",
     "datetime_combine",
+    "datetime_range_indexes",
+    "datetime_ranges",
     "datetime_to_str",
+    "datetimes_to_str",
     "disable_elastic_apm",
     "disable_migration",
     "disable_network",
     "fake_time",
     "format_json",
+    "get_clock",
     "get_data",
     "get_offset_and_limit",
+    "get_phone_region",
     "get_start_and_end_time",
     "get_uid",
     "identity",
+    "install_queue_logging",
     "is_chinese_phone",
     "is_int",
     "is_phone",
     "is_singapore_phone",
     "is_uuid",
     "is_telephone",
+    "iter_bytes_to_str",
+    "iter_format_json",
     "list_first",
     "list_get",
     "log_error",
+    "memoize",
     "merge_dicts",
     "mock_lambda",
     "mock_redis_lock",
     "mutes",
     "normalize",
+    "normalize_many",
     "quantize",
+    "quantize_many",
+    "set_error_limiter",
     "str_to_date",
     "str_to_datetime",
+    "str_to_datetime_many",
     "tomorrow",
+    "validate_many",
+    "write_json",
     "yesterday",
 ]
 
-try:
-    from .django.apis import Errors, check_error, get_object_or_error, get_request_ip, get_validation_error  # NOQA
-    from .django.databases import DynamicField, ExtendModelMixin, HManager, HQuerySet, ModelMixin  # NOQA
-    from .django.migrations import AlterDefault  # NOQA
-    from .django.unittest import extend_django_sqlite  # NOQA
+_LAZY_MODULES = {
+    ".classes": ["EmptyContextManager", "TupleEnum", "TupleFieldsMixin"],
+    ".data_types": [
+        "DataGetter",
+        "JSONEncoder",
+        "bytes_to_str",
+        "format_json",
+        "get_data",
+        "iter_bytes_to_str",
+        "iter_format_json",
+        "merge_dicts",
+        "normalize",
+        "normalize_many",
+        "quantize",
+        "quantize_many",
+        "write_json",
+    ],
+    ".decorators": ["LocalCache", "catches", "memoize", "mutes"],
+    ".logs": ["install_queue_logging"],
+    ".schemas": ["get_offset_and_limit", "get_start_and_end_time"],
+    ".shortcuts": [
+        "Clock",
+        "ErrorRateLimiter",
+        "date_to_str",
+        "datetime_combine",
+        "datetime_range_indexes",
+        "datetime_ranges",
+        "datetime_to_str",
+        "datetimes_to_str",
+        "get_clock",
+        "get_uid",
+        "identity",
+        "list_first",
+        "list_get",
+        "log_error",
+        "mock_lambda",
+        "set_error_limiter",
+        "str_to_date",
+        "str_to_datetime",
+        "str_to_datetime_many",
+        "tomorrow",
+        "yesterday",
+    ],
+    ".unittest": [
+        "TestCaseMixin",
+        "disable_elastic_apm",
+        "disable_migration",
+        "disable_network",
+        "fake_time",
+        "mock_redis_lock",
+    ],
+    ".validators": [
+        "PHONE_RULES",
+        "get_phone_region",
+        "is_chinese_phone",
+        "is_int",
+        "is_phone",
+        "is_singapore_phone",
+        "is_telephone",
+        "is_uuid",
+        "validate_many",
+    ],
+    ".django.apis": ["Errors", "check_error", "get_object_or_error", "get_request_ip", "get_validation_error"],
+    ".django.databases": ["DynamicField", "ExtendModelMixin", "HManager", "HQuerySet", "ModelMixin"],
+    ".django.migrations": ["AlterDefault"],
+    ".django.unittest": ["extend_django_sqlite"],
+}
+_LAZY_ATTRS = {name: module for module, names in _LAZY_MODULES.items() for name in names}
+_SUBMODULES = {
+    "classes",
+    "data_types",
+    "decorators",
+    "django",
+    "logs",
+    "schemas",
+    "shortcuts",
+    "unittest",
+    "validators",
+}
 
+if find_spec("django") is not None:
     __all__.extend(
         [
             "AlterDefault",
@@ -86,5 +166,25 @@ try:
             "get_validation_error",
         ]
     )
-except ImportError:
-    pass
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if sys.version_info < (3, 7):  # no module __getattr__ before PEP 562, load everything eagerly
+    for _name in list(_LAZY_ATTRS):
+        try:
+            __getattr__(_name)
+        except ImportError:
+            pass
@@ -3,11 +3,31 @@
 # this module provides various schema operations
 from __future__ import absolute_import, unicode_literals
 
+import collections
 import contextlib
 import enum
 from typing import Dict, List, Tuple
 
-from hutils.shortcuts import list_get
+# 按类缓存的查询索引，成员在类创建后不会再变化，所以第一次用到时建一次即可
+_TupleEnumIndexes = collections.namedtuple(
+    "_TupleEnumIndexes", ["values", "choices", "names", "chinese", "members", "labels", "encoded"]
+)
+UNKNOWN_POLICIES = ("raise", "default", "keep")
+_MISSING = object()
+
+
+class _FieldProperty(property):
+    """按位置直接取 obj_values 的属性，越界时为 None"""
+
+    def __init__(self, index):
+        self.index = index
+        super().__init__(lambda member: self._get(member))
+
+    def _get(self, member):
+        try:
+            return member.obj_values[self.index]
+        except IndexError:
+            return None
 
 
 class EmptyContextManager(contextlib.ContextDecorator):
@@ -24,7 +44,55 @@ class EmptyContextManager(contextlib.ContextDecorator):
         return False
 
 
-class TupleEnum(enum.Enum):
+class _TupleFieldsMeta(enum.EnumMeta):
+    """类创建完成后再生成 __fields__ 属性；3.11 以前 __init_subclass__ 运行时成员还不在类上，无法检查重名"""
+
+    def __new__(metacls, cls, bases, classdict, **kwargs):
+        enum_class = super().__new__(metacls, cls, bases, classdict, **kwargs)
+        for index, field in enumerate(enum_class.__dict__.get("__fields__", ())):
+            if index == 0 and field == "value":
+                continue
+            if not field.isidentifier() or field in ("name", "value", "obj_values"):
+                raise ValueError("field {!r} of {} is not allowed at {}".format(field, cls, index))
+            existing = next((_.__dict__[field] for _ in enum_class.__mro__ if field in _.__dict__), None)
+            if field in enum_class._member_names_ or not (existing is None or isinstance(existing, _FieldProperty)):
+                raise ValueError("field {!r} of {} conflicts with an existing attribute".format(field, cls))
+            setattr(enum_class, field, _FieldProperty(index))
+        return enum_class
+
+
+class TupleFieldsMixin(enum.Enum, metaclass=_TupleFieldsMeta):
+    """成员值为元组的枚举基类，第 0 个为 value，全部存在 obj_values 里。enum base storing tuple payloads.
+
+    Examples::
+
+        class Channels(TupleFieldsMixin):
+            __fields__ = 'value', 'chinese', 'code'
+            WECHAT = 1, '微信', 'wx'
+            ALIPAY = 2, '支付宝'
+        assert Channels.WECHAT.code == 'wx'
+        assert Channels.ALIPAY.code is None
+
+    - 没有成员的 Enum 子类，可以被 TupleEnum, Errors 等继承；
+      不用普通的 mixin 类，是因为带 __new__ 的 mixin 会成为枚举的数据类型，在旧版本 Python 里影响 pickle/format
+    - __fields__ 声明的字段变成按位置直接取值的属性；value 只能在第 0 个，
+      不能覆盖 name, obj_values, 成员以及类上已有的非字段属性
+    """
+
+    def __new__(cls, value, *args):
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj.obj_values = (value,) + args
+        return obj
+
+    def get_value_at(self, index, default=None):
+        try:
+            return self.obj_values[index]
+        except IndexError:
+            return default
+
+
+class TupleEnum(TupleFieldsMixin):
     """元组枚举类，可以用来存储多层信息。tuple enum for multi-dimension data enum.
 
     Examples::
@@ -36,49 +104,160 @@ class TupleEnum(enum.Enum):
             OTHERS = 3, '其他'
         assert Genders.FEMALE.value == 3
         assert Genders.MALE.chinese == '男性'
-    """
 
-    def __new__(cls, value, *args):
-        obj = object.__new__(cls)
-        obj._value_ = value
-        obj.obj_values = [value] + list(args)
-        return obj
+        class Channels(TupleEnum):
+            __fields__ = 'value', 'chinese', 'code'
+            WECHAT = 1, '微信', 'wx'
+            ALIPAY = 2, '支付宝'
+        assert Channels.WECHAT.code == 'wx'
+        assert Channels.ALIPAY.code is None
 
-    def get_value_at(self, index, default=None):
-        return list_get(self.obj_values, index, default=default)
+    - obj_values 是元组，所有成员共享同一份结构，不会被意外修改
+    - __fields__ 声明的字段按位置直接取值，缺省为 None，见 TupleFieldsMixin
+    """
+
+    __fields__ = "value", "chinese"
 
     def get_value_from(self, index, key, default=None):
         return self.get_value_at(index, {}).get(key, default)
 
-    @property
-    def chinese(self):
-        return self.get_value_at(1)
-
     @property
     def lower_name(self):
         """name in lower case"""
         return self.name.lower()
 
+    @classmethod
+    def _get_indexes(cls) -> _TupleEnumIndexes:
+        indexes = cls.__dict__.get("_tuple_enum_indexes")
+        if indexes is None:
+            members = tuple(cls)
+            chinese = {}
+            lookup = {}  # 原始值和成员本身 -> 成员
+            for member in members:
+                lookup[member] = member
+                try:
+                    lookup.setdefault(member.value, member)
+                except TypeError:
+                    pass
+                try:
+                    chinese.setdefault(member.chinese, member)
+                except TypeError:  # 第二个值不一定是可哈希的中文名
+                    pass
+            indexes = _TupleEnumIndexes(
+                values=tuple(_.value for _ in members),
+                choices=tuple((_.value, _.chinese) for _ in members),
+                names={_.name: _ for _ in members},
+                chinese=chinese,
+                members=lookup,
+                labels={key: member.chinese for key, member in lookup.items()},
+                encoded={key: member.value for key, member in lookup.items()},
+            )
+            cls._tuple_enum_indexes = indexes
+        return indexes
+
     @classmethod
     def chinese_choices(cls) -> List[Tuple]:
-        return [(_.value, _.chinese) for _ in cls]
+        return list(cls._get_indexes().choices)
 
     @classmethod
     def chinese_items(cls) -> Dict:
-        return dict(cls.chinese_choices())
+        return dict(cls._get_indexes().choices)
 
     @classmethod
     def values(cls) -> Tuple:
-        return tuple(_.value for _ in cls)
+        return cls._get_indexes().values
 
     @classmethod
     def from_lower(cls, lower_name):
         upper_name = lower_name.upper()
-        for value in cls:
-            if value.name == upper_name:
-                return value
-        raise ValueError("{!r} is not a valid {}".format(upper_name, cls.__name__))
+        try:
+            return cls._get_indexes().names[upper_name]
+        except KeyError:
+            raise ValueError("{!r} is not a valid {}".format(upper_name, cls.__name__)) from None
+
+    @classmethod
+    def from_chinese(cls, chinese):
+        """根据中文名获取枚举，重名时返回第一个。get member by chinese name."""
+        try:
+            return cls._get_indexes().chinese[chinese]
+        except (KeyError, TypeError):
+            raise ValueError("{!r} is not a valid {}".format(chinese, cls.__name__)) from None
 
     @classmethod
     def model_kwargs(cls):
         return {"max_length": max(len(_.value) for _ in cls), "choices": cls.chinese_choices()}
+
+    @classmethod
+    def _convert_many(cls, values, table, unknown, default, as_array):
+        """table: 使用哪个缓存的查询表，members/labels/encoded"""
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError("Unknown unknown {!r}, choices are {}".format(unknown, UNKNOWN_POLICIES))
+        lookup = getattr(cls._get_indexes(), table)
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        get = lookup.get
+        try:
+            result = [get(value, _MISSING) for value in values]
+        except TypeError:  # 有不可哈希的值，逐个处理
+            result = []
+            for value in values:
+                try:
+                    result.append(get(value, _MISSING))
+                except TypeError:
+                    result.append(_MISSING)
+        if any(_ is _MISSING for _ in result):  # 只比较身份，不触发结果的 __eq__
+            for index, value in enumerate(values):
+                if result[index] is not _MISSING:
+                    continue
+                if unknown == "raise":
+                    raise ValueError("{!r} is not a valid {}".format(value, cls.__name__))
+                result[index] = default if unknown == "default" else value
+        if as_array:
+            import numpy
+
+            return numpy.array(result, dtype=object if table == "members" else None)
+        return result
+
+    @classmethod
+    def decode_many(cls, values, unknown="raise", default=None, as_array=False):
+        """批量把原始值转成枚举成员，比逐个 cls(value) 快得多。decode raw values into members in batch.
+
+        Examples::
+
+            Genders.decode_many(User.objects.values_list('gender', flat=True))
+            Genders.decode_many([1, 2, 9], unknown='default')
+            # [Genders.MALE, Genders.FEMALE, None]
+
+        - unknown: 遇到未知值时 raise 抛 ValueError，default 用 default 代替，keep 保留原值
+        - 成员本身也可以作为输入，原样返回
+        - as_array: 返回 numpy 数组 (dtype=object)，需要安装 numpy
+
+        :rtype: list | numpy.ndarray
+        """
+        return cls._convert_many(values, "members", unknown, default, as_array)
+
+    @classmethod
+    def labels_for(cls, values, unknown="raise", default=None, as_array=False):
+        """批量获取原始值或成员对应的中文名。get chinese labels of raw values or members in batch.
+
+        Examples::
+
+            Genders.labels_for([1, Genders.FEMALE])
+            # ['男性', '女性']
+
+        :rtype: list | numpy.ndarray
+        """
+        return cls._convert_many(values, "labels", unknown, default, as_array)
+
+    @classmethod
+    def encode_many(cls, members, unknown="raise", default=None, as_array=False):
+        """批量把成员转成原始值，已经是原始值的会校验后原样返回。encode members into raw values in batch.
+
+        Examples::
+
+            Genders.encode_many([Genders.MALE, 2])
+            # [1, 2]
+
+        :rtype: list | numpy.ndarray
+        """
+        return cls._convert_many(members, "encoded", unknown, default, as_array)
@@ -3,62 +3,308 @@
 # this module provides various data types operation
 from __future__ import absolute_import, unicode_literals
 
+import collections
 import datetime
 import decimal
+import enum
+import functools
+import io
 import json
+import operator
+import sys
+import uuid
+
+from hutils.shortcuts import date_to_str, datetime_to_str
 
 try:
-    import bson
-    import pymongo  # NOQA
+    import orjson
 except ImportError:
-    bson = False
+    orjson = None
+
+
+_BYTES_TYPES = (bytes, bytearray, memoryview)
 
 
-def bytes_to_str(data):
-    """二进制类型转换为字符串，支持嵌套数组。bytes to string, supports nested list.
+def bytes_to_str(data, encoding="utf-8", errors="strict"):
+    """二进制类型转换为字符串，支持嵌套数组和字典。bytes to string, supports nested list and dict.
 
     Examples::
 
         string_value = bytes_to_str(redis.get('key'))
         values = bytes_to_str(redis.mget(*keys))
+        mapping = bytes_to_str(redis.hgetall('key'))
+
+    - bytes/bytearray/memoryview 直接解码，不额外复制
+    - dict 保持为 dict，其他可迭代对象 (list/tuple 等) 转为 list，其余值原样返回
+    - 使用栈而非递归，嵌套再深也不会超出递归上限
     """
-    if data is None:
+    if data is None or isinstance(data, str):
         return data
-    if isinstance(data, bytes):
-        return data.decode()
-    if isinstance(data, str):
+    if isinstance(data, _BYTES_TYPES):
+        return str(data, encoding, errors)
+    if not hasattr(data, "__iter__"):
         return data
-    return [bytes_to_str(_) for _ in data]
+    result = {} if isinstance(data, dict) else []
+    stack = [(data, result)]
+    while stack:
+        source, target = stack.pop()
+        if isinstance(source, dict):
+            for key, value in source.items():
+                if isinstance(key, _BYTES_TYPES):
+                    key = str(key, encoding, errors)
+                target[key] = _convert_bytes_item(value, stack, encoding, errors)
+        else:
+            for value in source:
+                target.append(_convert_bytes_item(value, stack, encoding, errors))
+    return result
+
+
+def _convert_bytes_item(value, stack, encoding, errors):
+    """convert scalar item, or push container item onto stack and return its placeholder"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, _BYTES_TYPES):
+        return str(value, encoding, errors)
+    if not hasattr(value, "__iter__"):
+        return value
+    target = {} if isinstance(value, dict) else []
+    stack.append((value, target))
+    return target
+
+
+def iter_bytes_to_str(data, encoding="utf-8", errors="strict"):
+    """惰性地逐个转换，适合 scan_iter 等大结果流。lazily convert items, for streaming scan results.
+
+    Examples::
+
+        for key in iter_bytes_to_str(redis.scan_iter(match='user:*')):
+            ...
+        for field, value in iter_bytes_to_str(redis.hscan_iter('key')):
+            ...
+    """
+    if isinstance(data, dict):
+        data = data.items()
+    for item in data:
+        yield bytes_to_str(item, encoding, errors)
+
+
+def _encode_decimal(o):
+    return str(o)
+
+
+def _encode_bytes(o):
+    return str(o, "utf-8")
+
+
+def _encode_bson_decimal(o):
+    return str(o.to_decimal())
+
+
+def _encode_numpy_array(o):
+    return o.tolist()
+
+
+def _encode_numpy_scalar(o):
+    return o.item()
 
 
 class JSONEncoder(json.JSONEncoder):
-    """序列化 JSON"""
+    """序列化 JSON，按类型查表分发。serialize json, dispatch encoders by type.
+
+    内置支持 Decimal, datetime, date, UUID, Enum (取 value), set, bytes/memoryview (utf-8)，
+    以及已被导入的 numpy 标量和数组。
+
+    Examples::
+
+        JSONEncoder.register(Money, lambda o: str(o.amount))
+
+        @JSONEncoder.register(User)
+        def encode_user(user):
+            return {'uid': user.uid.hex, 'name': user.name}
+    """
+
+    encoders = {
+        decimal.Decimal: _encode_decimal,
+        datetime.datetime: datetime_to_str,
+        datetime.date: date_to_str,
+        uuid.UUID: str,
+        enum.Enum: operator.attrgetter("value"),
+        set: list,
+        frozenset: list,
+        bytes: _encode_bytes,
+        bytearray: _encode_bytes,
+        memoryview: _encode_bytes,
+    }
+    _encoder_cache = {}
+
+    @classmethod
+    def register(cls, type_, encoder=None):
+        """注册类型的序列化函数，子类注册不影响父类。register encoder for type (and its subclasses).
+
+        :type type_: type
+        :type encoder: (object) -> object
+        """
+        if encoder is None:
+            return lambda func: cls.register(type_, func)
+        if "encoders" not in cls.__dict__:
+            cls.encoders = dict(cls.encoders)
+        cls.encoders[type_] = encoder
+        klasses = [cls]
+        while klasses:
+            klass = klasses.pop()
+            klass._encoder_cache = {}
+            klasses.extend(klass.__subclasses__())
+        return encoder
+
+    @classmethod
+    def get_encoder(cls, type_):
+        """根据类型 (及其 MRO) 找到序列化函数。find encoder by type, walking its mro.
+
+        :rtype: ((object) -> object) | None
+        """
+        encoder = cls.encoders.get(type_)
+        if encoder is not None:
+            return encoder
+        # 缓存按类隔离，不能经由继承读到父类的缓存 (子类可能直接覆盖了 encoders)
+        cache = cls.__dict__.get("_encoder_cache")
+        if cache is None:
+            cache = cls._encoder_cache = {}
+        try:
+            return cache[type_]
+        except KeyError:
+            pass
+        for klass in type_.__mro__[1:]:
+            encoder = cls.encoders.get(klass)
+            if encoder is not None:
+                break
+        else:
+            encoder = _get_optional_encoder(type_)
+        cache[type_] = encoder
+        return encoder
 
     def default(self, o):
-        if isinstance(o, decimal.Decimal):
-            return str(o)
-        if bson and isinstance(o, bson.Decimal128):
-            return str(o.to_decimal())
-        if isinstance(o, datetime.datetime):
-            return o.strftime("%Y-%m-%d %H:%M:%S")
-        if isinstance(o, datetime.date):
-            return o.strftime("%Y-%m-%d")
+        encoder = self.get_encoder(type(o))
+        if encoder is not None:
+            return encoder(o)
         return json.JSONEncoder.default(self, o)
 
 
-def format_json(data, ensure_ascii=False, **kwargs):
+def _get_optional_encoder(type_):
+    """可选依赖的类型只从 sys.modules 里找，从不主动 import。optional types are looked up from sys.modules only."""
+    bson = sys.modules.get("bson")
+    if bson is not None and issubclass(type_, getattr(bson, "Decimal128", ())):
+        return _encode_bson_decimal
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and issubclass(type_, numpy.ndarray):
+        return _encode_numpy_array
+    if numpy is not None and issubclass(type_, numpy.generic):
+        return _encode_numpy_scalar
+    return None
+
+
+def _dumps_json(data, **kwargs):
+    return json.dumps(data, **kwargs)
+
+
+def _dumps_orjson(data, cls=JSONEncoder, ensure_ascii=False, sort_keys=False, indent=None, **kwargs):
+    """非有限浮点数 (NaN/Infinity) 会被 orjson 写成 null，为了不额外遍历数据不做回退"""
+    if ensure_ascii or kwargs or indent not in (None, 2) or not issubclass(cls, JSONEncoder):
+        return _dumps_json(data, cls=cls, ensure_ascii=ensure_ascii, sort_keys=sort_keys, indent=indent, **kwargs)
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(data, default=cls().default, option=option).decode()
+    except TypeError:  # orjson.JSONEncodeError, e.g. non-str keys or integers over 64 bits
+        return _dumps_json(data, cls=cls, ensure_ascii=ensure_ascii, sort_keys=sort_keys, indent=indent)
+
+
+JSON_BACKENDS = {"json": _dumps_json}
+if orjson:
+    JSON_BACKENDS["orjson"] = _dumps_orjson
+JSON_BACKENDS["fast"] = JSON_BACKENDS.get("orjson", _dumps_json)
+JSON_BACKEND = "json"
+
+
+def set_json_backend(name):
+    """设置 format_json 默认使用的序列化后端。set default backend of format_json.
+
+    Examples::
+
+        set_json_backend('fast')  # orjson if installed, otherwise stdlib json
+
+    :type name: str
+    :rtype: str
+    """
+    global JSON_BACKEND
+    if name not in JSON_BACKENDS:
+        raise ValueError("Unknown json backend {!r}, choices are {}".format(name, sorted(JSON_BACKENDS)))
+    previous, JSON_BACKEND = JSON_BACKEND, name
+    return previous
+
+
+def format_json(data, ensure_ascii=False, backend=None, **kwargs):
     """序列化 JSON，支持中文和 datetime, decimal 类型。format json with utf8/datetime/decimal support.
 
     Examples::
 
         format_json({'key': 'name', 'value': '强哥'})
         # '{"key": "name", "value": "强哥"}'
+        format_json({'key': 'name', 'value': '强哥'}, backend='fast')
+        # '{"key":"name","value":"强哥"}'
+
+    backend 为 json 时输出与 json.dumps 完全一致；orjson 输出紧凑，不支持的参数会退回 json。
+    注意 NaN/Infinity: json 输出非标准的 NaN/Infinity，orjson 输出 null；需要报错时传 allow_nan=False (会退回 json)。
 
     :rtype: str
     """
 
-    kwargs.update(ensure_ascii=ensure_ascii, cls=JSONEncoder)
-    return json.dumps(data, **kwargs)
+    kwargs.setdefault("cls", JSONEncoder)
+    kwargs.update(ensure_ascii=ensure_ascii)
+    return JSON_BACKENDS[backend or JSON_BACKEND](data, **kwargs)
+
+
+def iter_format_json(data, ensure_ascii=False, chunk_size=65536, **kwargs):
+    """流式序列化 JSON，逐块产出字符串，用于导出大数据。iterate json chunks for large payloads.
+
+    Examples::
+
+        response = StreamingHttpResponse(iter_format_json(rows), content_type='application/json')
+
+    :type chunk_size: int
+    :rtype: collections.Iterable[str]
+    """
+    kwargs.setdefault("cls", JSONEncoder)
+    encoder = kwargs.pop("cls")(ensure_ascii=ensure_ascii, **kwargs)
+    buffer, size = [], 0
+    for part in encoder.iterencode(data):
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def write_json(data, fp, ensure_ascii=False, chunk_size=65536, encoding=None, **kwargs):
+    """流式写入 JSON 到文件或 socket，内存占用恒定。stream json into file or socket.
+
+    Examples::
+
+        with open('report.json', 'w') as f:
+            write_json(rows, f)
+        write_json(rows, sock)  # utf-8 encoded by default for sockets and binary files
+
+    :type encoding: str
+    """
+    write = getattr(fp, "write", None) or fp.sendall
+    if encoding is None and (not hasattr(fp, "write") or isinstance(fp, (io.RawIOBase, io.BufferedIOBase))):
+        encoding = "utf-8"
+    for chunk in iter_format_json(data, ensure_ascii=ensure_ascii, chunk_size=chunk_size, **kwargs):
+        write(chunk.encode(encoding) if encoding else chunk)
 
 
 def get_data(data, *keys, optional=False):
@@ -77,7 +323,72 @@ def get_data(data, *keys, optional=False):
     return map(lambda key: data[key], keys)
 
 
-def merge_dicts(*dicts: dict) -> dict:
+class DataGetter:
+    """预编译的批量取值器，一次构建，多次使用。precompiled getter for list data from dict.
+
+    Examples::
+
+        get_page = DataGetter('offset', 'limit', defaults={'offset': 0, 'limit': 20}, types={'limit': int})
+        offset, limit = get_page(request.data)
+        get_user = DataGetter('user.uid', 'user.profile.name', optional=True)
+        uid, name = get_user({'user': {'uid': 'x'}})
+        # ('x', None)
+
+    - 带点号的 key 按层级取嵌套字典的值
+    - 在 defaults 中的 key 缺失时返回默认值；optional=True 时所有 key 缺失都返回 None，否则抛 KeyError
+    - types 中的类型转换只作用于非 None 的值
+    """
+
+    def __init__(self, *keys, optional=False, defaults=None, types=None):
+        self.keys = keys
+        defaults = defaults or {}
+        types = types or {}
+        if not optional and not defaults and not types and not any("." in key for key in keys):
+            getter = operator.itemgetter(*keys) if keys else lambda data: ()
+            self._getter = (lambda data: (getter(data),)) if len(keys) == 1 else getter
+            return
+        self._plans = tuple(
+            (_make_path_getter(key), optional or key in defaults, defaults.get(key), types.get(key)) for key in keys
+        )
+        self._getter = self._get_by_plans
+
+    def _get_by_plans(self, data):
+        values = []
+        append = values.append
+        for getter, has_default, default, type_wrapper in self._plans:
+            try:
+                value = getter(data)
+            except (KeyError, TypeError):
+                if not has_default:
+                    raise
+                value = default
+            if type_wrapper is not None and value is not None:
+                value = type_wrapper(value)
+            append(value)
+        return tuple(values)
+
+    def __call__(self, data):
+        """
+        :type data: dict
+        :rtype: tuple
+        """
+        return self._getter(data)
+
+
+def _make_path_getter(key):
+    if "." not in key:
+        return operator.itemgetter(key)
+    getters = tuple(operator.itemgetter(part) for part in key.split("."))
+
+    def getter(data):
+        for get in getters:
+            data = get(data)
+        return data
+
+    return getter
+
+
+def merge_dicts(*dicts: dict, deep=False, lazy=False, inplace=False, list_strategy="replace"):
     """依次合并多个字典。merge multiple dict one by one.
 
     Examples::
@@ -85,13 +396,62 @@ def merge_dicts(*dicts: dict) -> dict:
         offset_limit_schema = {'offset': Validation(...), 'limit': Validation(...)}
         ...
         schema = merge_dicts(offset_limit_schema, from_to_schema, payment_schema)
+        schema = merge_dicts(offset_limit_schema, from_to_schema, lazy=True)  # ChainMap 视图，不复制
+        config = merge_dicts(defaults, overrides, deep=True, list_strategy='append')
+        merge_dicts(my_own_dict, extra, inplace=True)  # 直接修改并返回第一个字典
+
+    - lazy: 返回 ChainMap，后面的字典优先，之后对原字典的修改会反映在视图上
+    - deep: 递归合并嵌套字典，list_strategy 决定列表如何合并: replace/append/unique；
+      结果中的字典和列表都是新建的 (列表为浅复制)，修改结果不会影响传入的字典
+    - inplace: 把结果直接写入第一个字典，省去复制
     """
-    dict_merged = {}
+    if list_strategy not in _LIST_STRATEGIES:
+        raise ValueError("Unknown list_strategy {!r}, choices are {}".format(list_strategy, sorted(_LIST_STRATEGIES)))
+    if lazy:
+        if deep or inplace:
+            raise ValueError("Can not specify lazy with deep or inplace at the same time")
+        return collections.ChainMap(*reversed(dicts))
+    if inplace and dicts:
+        dict_merged, dicts = dicts[0], dicts[1:]
+    else:
+        dict_merged = {}
     for d in dicts:
-        dict_merged.update(d)
+        if deep:
+            _deep_update(dict_merged, d, _LIST_STRATEGIES[list_strategy])
+        else:
+            dict_merged.update(d)
     return dict_merged
 
 
+def _merge_unique(target: list, source: list) -> list:
+    return target + [_ for _ in source if _ not in target]
+
+
+_LIST_STRATEGIES = {
+    "replace": lambda target, source: list(source),
+    "append": lambda target, source: target + source,
+    "unique": _merge_unique,
+}
+
+
+def _deep_update(target: dict, source: dict, merge_list):
+    """递归合并，target 中的嵌套字典要么属于调用方 (inplace)，要么是新建的，可直接修改；source 不会被修改"""
+    stack = [(target, source)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            current = target.get(key)
+            if isinstance(value, dict):
+                if not isinstance(current, dict):
+                    target[key] = current = {}
+                stack.append((current, value))
+            elif isinstance(value, list):
+                # 无论哪种策略都放入新列表，修改结果不会影响 source
+                target[key] = merge_list(current, value) if isinstance(current, list) else list(value)
+            else:
+                target[key] = value
+
+
 def normalize(value):
     """将一个数右边的零给干掉。remove trailing zeros from number.
 
@@ -110,6 +470,48 @@ def normalize(value):
     return str_value.rstrip("0").rstrip(".") if "." in str_value else str_value
 
 
+def normalize_many(values):
+    """批量去掉数字右边的零，结果与逐个 normalize 一致。remove trailing zeros from numbers in batch.
+
+    Examples::
+
+        normalize_many([decimal.Decimal('80.00'), 12.30, 6])
+        # ['80', '12.3', '6']
+        normalize_many(numpy.array([1, 2, 3]))
+        # ['1', '2', '3']
+
+    - 整数类型的 numpy 数组直接整体转换为字符串，无需逐个处理
+    - 其他 numpy 数组先用 tolist() 转为原生类型，格式与 str() 保持一致
+    - 多维数组会被展平
+
+    :rtype: list[str]
+    """
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype.kind in "iu":
+            return values.astype(str).ravel().tolist()
+        values = values.ravel().tolist()
+    result = []
+    append = result.append
+    for value in values:
+        if value.__class__ is not str:
+            value = str(value)
+        append(value.rstrip("0").rstrip(".") if "." in value else value)
+    return result
+
+
+_QUANTIZE_CONTEXT = decimal.Context(prec=28)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_quantum(places=2):
+    """获取小数位数对应的量子，如 2 位对应 Decimal('0.01')。get cached quantum for decimal places.
+
+    :rtype: decimal.Decimal
+    """
+    return decimal.Decimal(1).scaleb(-places)
+
+
 def quantize(value, rounding=decimal.ROUND_HALF_UP):
     """强制转换为两位小数类型。quantize value to two digits decimal.
 
@@ -120,4 +522,37 @@ def quantize(value, rounding=decimal.ROUND_HALF_UP):
 
     :rtype: decimal.Decimal
     """
-    return decimal.Decimal(value).quantize(decimal.Decimal(".01"), rounding=rounding)
+    return decimal.Decimal(value).quantize(_get_quantum(2), rounding=rounding)
+
+
+def quantize_many(values, places=2, rounding=decimal.ROUND_HALF_UP, float_as_str=False):
+    """批量强制转换小数位数。quantize values in batch.
+
+    Examples::
+
+        amounts = quantize_many(row['amount'] for row in rows)
+        amounts = quantize_many(array.array('d', [5.25, 6.98]), float_as_str=True)
+
+    - 默认 float 按二进制精确值转换，结果与 quantize(value) 一致，如 2.675 实为 2.67499...，得 2.67
+    - float_as_str=True 时 float 按 repr (最短还原字符串) 转换，结果与 quantize(str(value)) 一致，得 2.68；
+      numpy 的浮点数按各自精度的最短还原字符串转换，如 float32(2.675) 同样得 2.68
+
+    :type values: collections.Iterable
+    :type places: int
+    :type float_as_str: bool
+    :rtype: list[decimal.Decimal]
+    """
+    quantum, context, to_decimal = _get_quantum(places), _QUANTIZE_CONTEXT, decimal.Decimal
+    numpy = sys.modules.get("numpy")
+    numpy_floating = numpy.floating if numpy is not None else ()
+    result = []
+    append = result.append
+    for value in values:
+        if float_as_str and isinstance(value, float):
+            value = float.__repr__(value)  # 子类 (如 numpy 2 的 float64) 的 repr 不一定是数字
+        elif float_as_str and isinstance(value, numpy_floating):
+            value = str(value)  # float32 等不是 float 子类，str 给出该精度下的最短还原字符串
+        elif not isinstance(value, (decimal.Decimal, int, float, str)):
+            value = operator.index(value) if hasattr(value, "__index__") else float(value)
+        append(to_decimal(value).quantize(quantum, rounding, context))
+    return result
@@ -1,13 +1,63 @@
 # -*- coding: utf-8 -*-
-import contextlib
+import collections
 import functools as fn
+import inspect
+import threading
+import time
 from typing import Callable, Union
 
 from hutils.shortcuts import log_error
 
+_MISSING = object()
 
-@contextlib.contextmanager
-def catches(*exceptions, raises: Union[BaseException, Callable[[Exception], BaseException]], logger=None):
+
+class _KwargsMark:
+    """隔开位置参数和关键字参数的标记，同 functools._make_key 的 kwd_mark。
+    单例，repr 和 pickle 在各个进程里都一样，Redis 等外部后端可以直接序列化 key 共享缓存。
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<kwargs>"
+
+    def __reduce__(self):
+        return "_KWARGS_MARK"
+
+
+_KWARGS_MARK = _KwargsMark()
+
+
+def _wrap_async_generator(func, exceptions, handle):
+    """包装异步生成器函数，出错时交给 handle 处理并结束迭代；支持 asend 和 athrow"""
+
+    @fn.wraps(func)
+    async def wrapper(*args, **kwargs):
+        generator = func(*args, **kwargs)
+        method, value = generator.asend, None
+        try:
+            while True:
+                try:
+                    item = await method(value)
+                except StopAsyncIteration:
+                    return
+                except exceptions as ex:
+                    handle(ex)
+                    return
+                try:
+                    value = yield item
+                    method = generator.asend
+                except GeneratorExit:
+                    raise
+                except BaseException as ex:  # athrow 进来的异常交给内层生成器处理
+                    method, value = generator.athrow, ex
+        finally:
+            await generator.aclose()
+
+    return wrapper
+
+
+class catches:
     """封装转换错误类。transfer exceptions to a different type.
 
     Examples::
@@ -18,16 +68,66 @@ def catches(*exceptions, raises: Union[BaseException, Callable[[Exception], Base
         @catches(raises=get_validation_error, log=True)
         def raise_io_error():
             raise ValueError('should wrap this error')
+
+        async with catches(ValueError, raises=IOError()):
+            await do_something()
     """
-    exceptions = exceptions or (Exception,)
-    try:
-        yield
-    except exceptions as ex:
-        if callable(raises):
-            raises = raises(ex)
-        if logger:
-            log_error(logger, raises)
-        raise raises from ex
+
+    def __init__(self, *exceptions, raises: Union[BaseException, Callable[[Exception], BaseException]], logger=None):
+        self.exceptions = exceptions or (Exception,)
+        self.raises = raises
+        self.logger = logger
+
+    def convert(self, ex):
+        """把捕获的错误转换为要抛出的错误"""
+        raises = self.raises(ex) if callable(self.raises) else self.raises
+        if self.logger:
+            log_error(self.logger, raises)
+        return raises
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_val is not None and isinstance(exc_val, self.exceptions):
+            raise self.convert(exc_val) from exc_val
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+    def __call__(self, func):
+        exceptions, convert = self.exceptions, self.convert
+
+        if inspect.isasyncgenfunction(func):
+
+            def handle(ex):
+                raise convert(ex) from ex
+
+            return _wrap_async_generator(func, exceptions, handle)
+
+        if inspect.iscoroutinefunction(func):
+
+            @fn.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as ex:
+                    raise convert(ex) from ex
+
+            return async_wrapper
+
+        @fn.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except exceptions as ex:
+                raise convert(ex) from ex
+
+        return wrapper
 
 
 class mutes:
@@ -38,6 +138,12 @@ class mutes:
         @mutes(returns=42)
         def get_answer(a, b):
             return a + b
+
+        @mutes(returns=42)
+        async def fetch_answer(a, b):
+            return await remote_add(a, b)
+
+    装饰异步生成器时，出错会记录日志并结束迭代 (不会产出 returns)。
     """
 
     def __init__(self, *exceptions, returns=None, logger=None):
@@ -49,18 +155,241 @@ class mutes:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if any([exc for exc in self.exceptions if isinstance(exc_val, exc)]):
+        if exc_val is not None and isinstance(exc_val, self.exceptions):
             if self.logger:
                 log_error(self.logger, exc_val)
             return True
         return False
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
     def __call__(self, func):
+        exceptions = self.exceptions
+
+        if inspect.isasyncgenfunction(func):
+
+            def handle(ex):
+                if self.logger:
+                    log_error(self.logger, ex)
+
+            return _wrap_async_generator(func, exceptions, handle)
+
+        if inspect.iscoroutinefunction(func):
+
+            @fn.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as ex:
+                    if self.logger:
+                        log_error(self.logger, ex)
+                    return self.returns
+
+            return async_wrapper
+
         @fn.wraps(func)
         def wrapper(*args, **kwargs):
-            value = self.returns
-            with self:
-                value = func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            except exceptions as ex:
+                if self.logger:
+                    log_error(self.logger, ex)
+                return self.returns
+
+        return wrapper
+
+
+CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "stale", "currsize"])
+
+
+class LocalCache:
+    """进程内的 LRU 缓存后端。in-process lru cache backend.
+
+    自定义后端 (比如 Redis) 只需实现同样的 get/set/clear 接口，条目为 (value, expires_at) 元组。
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            if self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _KeyLocks:
+    """按 key 分配的锁，没人使用时自动回收"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [self.factory(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, key):
+        with self._lock:
+            entry = self._locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+
+def _make_key(args, kwargs):
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+
+
+class memoize:
+    """缓存函数结果，支持 LRU/TTL、按 key 加锁防击穿、命中统计，以及刷新失败时返回旧值。
+    memoize function results with lru/ttl eviction, per-key locking, statistics and stale fallback.
+
+    Examples::
+
+        @memoize(maxsize=1024, ttl=60)
+        def get_config(name):
+            return Config.objects.get(name=name).value
+
+        @memoize(ttl=60, stale_on=(IOError,), logger=__name__)  # 刷新出错时静默 (同 mutes) 并返回过期的旧值
+        async def get_exchange_rate(currency):
+            return await fetch_rate(currency)
+
+        get_config.cache_info()
+        # CacheInfo(hits=42, misses=1, stale=0, currsize=1)
+        get_config.cache_clear()
+
+    :param maxsize: 默认后端 LocalCache 的容量，None 为不限
+    :param ttl: 过期秒数，None 为永不过期
+    :param backend: 自定义缓存后端，需实现 get/set/clear
+    :param key: 根据 (args, kwargs) 生成缓存 key 的函数，默认的 key 是可以 pickle/repr 的元组
+    :param stale_on: 刷新时出现这些错误则返回过期的旧值
+    :param logger: 返回旧值时记录错误日志
+    """
+
+    def __init__(self, maxsize=128, ttl=None, backend=None, key=None, stale_on=(), logger=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.key = key or _make_key
+        self.stale_on = tuple(stale_on)
+        self.logger = logger
+
+    def __call__(self, func):
+        backend = self.backend if self.backend is not None else LocalCache(self.maxsize)
+        make_key, ttl, stale_on, logger = self.key, self.ttl, self.stale_on, self.logger
+        stats = [0, 0, 0]  # hits, misses, stale
+        stats_lock = threading.Lock()
+
+        def count(index):
+            with stats_lock:
+                stats[index] += 1
+
+        def get_fresh(key):
+            entry = backend.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                count(0)
+                return entry, True
+            return entry, False
+
+        def save(key, value):
+            backend.set(key, (value, None if ttl is None else time.time() + ttl))
             return value
 
+        if inspect.iscoroutinefunction(func):
+            import asyncio  # 协程函数必然已经加载过 asyncio，不在模块级引入
+
+            locks = _KeyLocks(asyncio.Lock)
+
+            @fn.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                entry, fresh = get_fresh(key)
+                if fresh:
+                    return entry[0]
+                lock = locks.acquire(key)
+                try:
+                    async with lock:
+                        entry, fresh = get_fresh(key)
+                        if fresh:
+                            return entry[0]
+                        count(1)
+                        if entry is None or not stale_on:
+                            return save(key, await func(*args, **kwargs))
+                        value = _MISSING
+                        with mutes(*stale_on, logger=logger):
+                            value = await func(*args, **kwargs)
+                        if value is _MISSING:
+                            count(2)
+                            return entry[0]
+                        return save(key, value)
+                finally:
+                    locks.release(key)
+
+        else:
+            locks = _KeyLocks(threading.Lock)
+
+            @fn.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                entry, fresh = get_fresh(key)
+                if fresh:
+                    return entry[0]
+                lock = locks.acquire(key)
+                try:
+                    with lock:
+                        entry, fresh = get_fresh(key)
+                        if fresh:
+                            return entry[0]
+                        count(1)
+                        if entry is None or not stale_on:
+                            return save(key, func(*args, **kwargs))
+                        value = _MISSING
+                        with mutes(*stale_on, logger=logger):
+                            value = func(*args, **kwargs)
+                        if value is _MISSING:
+                            count(2)
+                            return entry[0]
+                        return save(key, value)
+                finally:
+                    locks.release(key)
+
+        def cache_info():
+            with stats_lock:
+                hits, misses, stale = stats
+            return CacheInfo(hits, misses, stale, len(backend) if hasattr(backend, "__len__") else None)
+
+        def cache_clear():
+            backend.clear()
+            with stats_lock:
+                stats[:] = [0, 0, 0]
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
         return wrapper
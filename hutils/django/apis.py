@@ -1,13 +1,13 @@
 # -*- coding: utf-8 -*-
 #
 # this module provides django rest framework related methods
-import enum
 import inspect
 
 from django.core.exceptions import ValidationError
 from django.db import models
 
-from hutils import list_get, log_error
+from hutils import log_error
+from hutils.classes import TupleFieldsMixin
 
 
 def get_validation_error(message, data=None, code=None):
@@ -96,14 +96,10 @@ def get_object_or_error(
     return result
 
 
-class Errors(enum.Enum):
-    """错误类"""
+class Errors(TupleFieldsMixin):
+    """错误类，同 TupleEnum 一样可以用 __fields__ 声明更多字段"""
 
-    def __new__(cls, value, *args):
-        obj = object.__new__(cls)
-        obj._value_ = value
-        obj.obj_values = [value] + list(args)
-        return obj
+    __fields__ = "value", "code"
 
     def check(self, condition, **kwargs):
         check_error(condition, self.value.format(**kwargs), code=self.code)
@@ -118,7 +114,3 @@ class Errors(enum.Enum):
         """一般这里都是后端懒的搞，直接 except Exception 转前端报错。一般不推荐，所以在这种情况都统统打 sentry, 一定要处理"""
         log_error(__name__, ex)
         return get_validation_error(str(ex))
-
-    @property
-    def code(self):
-        return list_get(self.obj_values, 1, default=None)
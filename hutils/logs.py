@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# this module provides logging related helpers
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+
+OVERFLOW_POLICIES = ("drop", "drop_oldest", "block")
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """有界队列的 QueueHandler，队列满时按 overflow 策略处理。queue handler with bounded queue and overflow policy.
+
+    - drop: 丢弃新日志
+    - drop_oldest: 丢弃最旧的日志，放入新日志
+    - block: 阻塞等待队列有空位
+    """
+
+    def __init__(self, queue_, overflow="drop"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow {!r}, choices are {}".format(overflow, OVERFLOW_POLICIES))
+        super(BoundedQueueHandler, self).__init__(queue_)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record):
+        """只合并消息参数，保留 exc_info 给后端 (如 Sentry) 使用，格式化交给监听线程"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            self.dropped += 1
+        if self.overflow == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+
+
+class QueueLogging:
+    """把 logger 原有的 handler 移到后台线程执行，stop 时写完剩余日志并还原。
+    move logger handlers to background threads, flush and restore them on stop.
+
+    - 每个 logger 一个队列和监听线程，日志只交给它所属 logger 原有的 handler，propagate 照常生效
+    - 没有 handler 的 logger (比如默认的 root) 保持原样，日志仍由 logging.lastResort 输出
+    """
+
+    def __init__(self, loggers, maxsize=10000, overflow="drop"):
+        self.loggers = []
+        for logger in loggers:
+            if logger.handlers and logger not in self.loggers:
+                self.loggers.append(logger)
+        self.original_handlers = [list(logger.handlers) for logger in self.loggers]
+        self.handlers = [BoundedQueueHandler(queue.Queue(maxsize), overflow=overflow) for _ in self.loggers]
+        self.listeners = [
+            logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+            for handler, handlers in zip(self.handlers, self.original_handlers)
+        ]
+        self._started = False
+
+    @property
+    def dropped(self):
+        """队列满时丢弃的日志数"""
+        return sum(handler.dropped for handler in self.handlers)
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        for logger, handler, listener in zip(self.loggers, self.handlers, self.listeners):
+            listener.start()
+            logger.handlers = [handler]
+        atexit.register(self.stop)
+
+    def stop(self):
+        if not self._started:
+            return
+        self._started = False
+        for logger, handlers, listener in zip(self.loggers, self.original_handlers, self.listeners):
+            logger.handlers = handlers
+            listener.stop()
+        atexit.unregister(self.stop)
+
+
+def install_queue_logging(*loggers, maxsize=10000, overflow="drop"):
+    """让日志 (包括 log_error) 异步写入，请求线程只负责入队。log asynchronously through a bounded queue.
+
+    Examples::
+
+        install_queue_logging()  # root logger
+        install_queue_logging('django.request', 'celery', maxsize=1000, overflow='drop_oldest')
+
+    - 原有的 handler 在后台线程里执行，Sentry 等慢 handler 不再阻塞请求
+    - 每个 logger 使用独立的队列，只交给自己原有的 handler；没有 handler 的 logger 会被跳过
+    - 队列有界，满时按 overflow 策略处理: drop/drop_oldest/block
+    - 进程退出时自动写完队列里剩余的日志，也可以手动调用返回值的 stop()
+
+    :type loggers: str | logging.Logger
+    :rtype: QueueLogging
+    """
+    loggers = [logging.getLogger(_) if not isinstance(_, logging.Logger) else _ for _ in loggers or [None]]
+    listener = QueueLogging(loggers, maxsize=maxsize, overflow=overflow)
+    listener.start()
+    return listener
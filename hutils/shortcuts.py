@@ -3,9 +3,24 @@
 # this module provides various one liners
 from __future__ import absolute_import, unicode_literals
 
+import atexit
+import bisect
+import collections.abc
+import contextlib
 import datetime
+import functools
+import itertools
 import logging
-from typing import Iterable, Optional, Tuple
+import operator
+import sys
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # python 3.6
+    ContextVar = None
 
 
 def datetime_combine(
@@ -32,6 +47,114 @@ def datetime_combine(
     )
 
 
+def datetime_ranges(
+    start_date: datetime.date, end_date: datetime.date, unit: Union[str, int] = "day"
+) -> Iterator[Tuple[datetime.datetime, datetime.datetime]]:
+    """惰性生成一段日期内按天/周/月/N 天分组的起止时间。iterate start/end datetime buckets between dates.
+
+    Examples::
+
+        for start, end in datetime_ranges(datetime.date(2018, 8, 1), datetime.date(2018, 8, 31), 'week'):
+            ...
+
+    - 每组的起止时间与 datetime_combine 一致 (time.min ~ time.max)
+    - week 以周一为一周开始，month 以自然月分组；首尾两组会截断在 start_date/end_date 内
+    - unit 为整数时，从 start_date 开始每 N 天一组
+    """
+    if unit not in ("day", "week", "month") and not (isinstance(unit, int) and unit > 0):
+        raise ValueError("Unknown unit {!r}, choices are day, week, month or positive days".format(unit))
+    if isinstance(start_date, datetime.datetime):
+        start_date = start_date.date()
+    if isinstance(end_date, datetime.datetime):
+        end_date = end_date.date()
+    return _iter_datetime_ranges(start_date, end_date, unit)
+
+
+def _iter_datetime_ranges(start_date, end_date, unit):
+    one_day = datetime.timedelta(days=1)
+    current = start_date
+    while current <= end_date:
+        if unit == "day":
+            bucket_end = current
+        elif unit == "week":
+            bucket_end = current + datetime.timedelta(days=6 - current.weekday())
+        elif unit == "month":
+            bucket_end = (current.replace(day=1) + datetime.timedelta(days=32)).replace(day=1) - one_day
+        else:
+            bucket_end = current + datetime.timedelta(days=unit - 1)
+        bucket_end = min(bucket_end, end_date)
+        yield datetime_combine(current, bucket_end)
+        current = bucket_end + one_day
+
+
+def datetime_range_indexes(values: Iterable, ranges: Iterable) -> List[Optional[int]]:
+    """用二分查找把大量时间分配到各个起止时间分组里。locate bucket index for each datetime by bisect.
+
+    Examples::
+
+        ranges = list(datetime_ranges(start_date, end_date, 'month'))
+        for index, order in zip(datetime_range_indexes([_.created_at for _ in orders], ranges), orders):
+            ...
+
+    :param values: datetime 或 date (按当天 0 点计算)
+    :param ranges: 按时间排序、互不重叠的 (start, end)
+    :return: 每个值所在分组的下标，不在任何分组内时为 None
+    """
+    ranges = list(ranges)
+    starts = [start for start, _ in ranges]
+    indexes = []
+    append = indexes.append
+    for value in values:
+        if not isinstance(value, datetime.datetime):
+            value = datetime.datetime.combine(value, datetime.time.min)
+        index = bisect.bisect_right(starts, value) - 1
+        append(index if index >= 0 and value <= ranges[index][1] else None)
+    return indexes
+
+
+_FORMAT_ATTRIBUTES = {"Y": "year", "m": "month", "d": "day", "H": "hour", "M": "minute", "S": "second"}
+
+
+@functools.lru_cache(maxsize=128)
+def _get_formatter(fmt):
+    """把只含定宽指令的格式编译成 % 模板，其余格式使用 strftime。compile fixed width format to formatter.
+
+    :rtype: (datetime.date) -> str
+    """
+    template, attributes, index = [], [], 0
+    while index < len(fmt):
+        char = fmt[index]
+        directive = fmt[index + 1] if char == "%" and index + 1 < len(fmt) else ""
+        if directive == "%":
+            template.append("%%")
+        elif directive in _FORMAT_ATTRIBUTES:
+            template.append("%04d" if directive == "Y" else "%02d")
+            attributes.append(_FORMAT_ATTRIBUTES[directive])
+        elif char == "%":
+            return operator.methodcaller("strftime", fmt)
+        else:
+            template.append(char)
+            index += 1
+            continue
+        index += 2
+    template = "".join(template)
+    if not attributes:
+        return lambda value: template % ()
+    attrgetter = operator.attrgetter(*attributes)
+    getter = attrgetter if len(attributes) > 1 else lambda value: (attrgetter(value),)
+
+    def formatter(value):
+        try:
+            # strftime 对于 1000 年以前的 %Y 在不同平台上补零规则不同，交给它自己处理
+            if value.year < 1000:
+                return value.strftime(fmt)
+            return template % getter(value)
+        except AttributeError:  # date 没有时分秒，time 没有年月日
+            return value.strftime(fmt)
+
+    return formatter
+
+
 def datetime_to_str(value, fmt="%Y-%m-%d %H:%M:%S"):
     """时间类型转换为字符串。datetime to string.
 
@@ -39,7 +162,22 @@ def datetime_to_str(value, fmt="%Y-%m-%d %H:%M:%S"):
     :type fmt: str
     :rtype: str
     """
-    return value.strftime(fmt)
+    return _get_formatter(fmt)(value)
+
+
+def datetimes_to_str(values, fmt="%Y-%m-%d %H:%M:%S"):
+    """批量把时间类型转换为字符串。format datetimes to strings in batch.
+
+    Examples::
+
+        rows = zip(names, datetimes_to_str(created_ats))
+
+    :type values: collections.Iterable[datetime.date]
+    :type fmt: str
+    :rtype: list[str]
+    """
+    formatter = _get_formatter(fmt)
+    return [formatter(value) for value in values]
 
 
 def date_to_str(value, fmt="%Y-%m-%d"):
@@ -49,7 +187,7 @@ def date_to_str(value, fmt="%Y-%m-%d"):
     :type fmt: str
     :rtype: str
     """
-    return value.strftime(fmt)
+    return _get_formatter(fmt)(value)
 
 
 def get_uid(instance):
@@ -95,11 +233,31 @@ def list_get(instances: Iterable, index: int, default=None):
 
         list_get([0, 1, 2], 3, 4)
         # 4
+        list_get(User.objects.order_by('-id'), 0)  # 只查询一行 (LIMIT 1)
+
+    - 序列直接索引，不复制
+    - QuerySet 用切片只取一行，负数索引时才会整体加载
+    - 其他可迭代对象用 islice 取到为止；负数索引时只保留末尾的几个元素
     """
-    try:
-        return list(instances)[index]
-    except IndexError:
-        return default
+    if type(instances) in (list, tuple) or isinstance(instances, collections.abc.Sequence):
+        try:
+            return instances[index]
+        except IndexError:
+            return default
+    if index >= 0 and _is_queryset(instances):
+        end = index + 1
+        return next(iter(instances[index:end]), default)
+    iterator = iter(instances)
+    if index >= 0:
+        return next(itertools.islice(iterator, index, None), default)
+    tail = collections.deque(iterator, maxlen=-index)
+    return tail[0] if len(tail) == -index else default
+
+
+def _is_queryset(instances):
+    """不主动 import django，只有已加载时才判断"""
+    models = sys.modules.get("django.db.models")
+    return models is not None and isinstance(instances, models.QuerySet)
 
 
 def mock_lambda(return_value=None, raises: Exception = None, **kwargs):
@@ -123,6 +281,129 @@ def mock_lambda(return_value=None, raises: Exception = None, **kwargs):
     return func
 
 
+class ErrorRateLimiter:
+    """错误日志限流器：相同错误 (logger + 异常类型 + 抛出位置) 按令牌桶限流，被压制的次数定期汇总。
+    error log limiter, deduplicates by error key with token bucket and summarizes suppressed ones.
+
+    Examples::
+
+        set_error_limiter(ErrorRateLimiter(rate=1, burst=5, summary_interval=60))
+
+    :param rate: 每个错误每秒补充的令牌数
+    :param burst: 令牌桶容量，即可以连续记录的次数
+    :param summary_interval: 至少间隔多少秒汇总一次被压制的次数
+    :param max_keys: 最多记录多少种错误，超出时淘汰最久没出现的
+    """
+
+    def __init__(self, rate=1.0, burst=5, summary_interval=60.0, max_keys=1024):
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+        self._buckets = collections.OrderedDict()  # key -> [tokens, updated_at, suppressed, summarized_at]
+        self._lock = threading.Lock()
+        self._swept_at = time.monotonic()
+
+    @staticmethod
+    def get_key(logger: logging.Logger, message) -> tuple:
+        """同一 logger 下，异常按类型和最内层抛出位置去重，普通消息按消息模板去重"""
+        error = message if isinstance(message, BaseException) else sys.exc_info()[1]
+        if error is None:
+            return logger.name, str(message)
+        site, traceback = None, error.__traceback__
+        while traceback is not None:
+            site, traceback = (traceback.tb_frame.f_code.co_filename, traceback.tb_lineno), traceback.tb_next
+        return logger.name, type(error), site
+
+    def acquire(self, key) -> Tuple[bool, int]:
+        """尝试获取一个令牌
+
+        :return: (是否记录本次错误, 需要汇总报告的被压制次数)
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+            else:
+                bucket[2] += 1
+            if bucket[2] and (allowed or now - bucket[3] >= self.summary_interval):
+                suppressed, bucket[2], bucket[3] = bucket[2], 0, now
+                return allowed, suppressed
+            return allowed, 0
+
+    def pop_due(self) -> List[Tuple[tuple, int]]:
+        """取出距上次汇总已超过 summary_interval 的其他错误的被压制次数，最多每个 summary_interval 检查一次。
+        这样某种错误停止出现后，它最后被压制的次数也会随着其他错误的记录被报告出来。
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept_at < self.summary_interval:
+                return []
+            self._swept_at = now
+            pending = []
+            for key, bucket in self._buckets.items():
+                if bucket[2] and now - bucket[3] >= self.summary_interval:
+                    pending.append((key, bucket[2]))
+                    bucket[2], bucket[3] = 0, now
+            return pending
+
+    def flush(self) -> List[Tuple[tuple, int]]:
+        """汇总所有尚未报告的被压制次数，set_error_limiter 会在进程退出时自动调用"""
+        now = time.monotonic()
+        with self._lock:
+            pending = [(key, bucket[2]) for key, bucket in self._buckets.items() if bucket[2]]
+            for key, _ in pending:
+                self._buckets[key][2], self._buckets[key][3] = 0, now
+        for key, suppressed in pending:
+            _log_suppressed(logging.getLogger(key[0]), key, suppressed)
+        return pending
+
+
+def _log_suppressed(logger, key, suppressed):
+    parts = []
+    for part in key[1:]:
+        if isinstance(part, type):
+            part = part.__name__
+        elif isinstance(part, tuple):
+            part = "at {}:{}".format(*part)
+        parts.append(str(part))
+    logger.warning("suppressed %d similar errors: %s", suppressed, " ".join(parts))
+
+
+_error_limiter = None  # type: Optional[ErrorRateLimiter]
+
+
+def set_error_limiter(limiter: Optional[ErrorRateLimiter]) -> Optional[ErrorRateLimiter]:
+    """设置 log_error 的全局限流器，传 None 关闭限流。set global limiter of log_error, None to disable.
+
+    catches/mutes/Errors.lazy_error 等都通过 log_error 记录错误，同样受限流控制。
+
+    被压制次数的汇总:
+
+    - 同一错误再次出现且距上次汇总超过 summary_interval 时报告
+    - 记录任意错误时，顺带报告其他已超过 summary_interval 的错误 (见 ErrorRateLimiter.pop_due)
+    - 进程退出时通过 atexit 调用 flush 报告剩余的次数 (被替换下来的限流器同样会报告)
+
+    :return: 之前的限流器
+    """
+    global _error_limiter
+    previous, _error_limiter = _error_limiter, limiter
+    if limiter is not None:
+        atexit.unregister(limiter.flush)  # 重复设置时不重复注册
+        atexit.register(limiter.flush)
+    return previous
+
+
 def log_error(logger, message, *args, exc_info=True, **kwargs):
     """记录错误日志的快捷方式，顺带支持 Sentry。log error, supports sentry detail trace.
 
@@ -130,9 +411,21 @@ def log_error(logger, message, *args, exc_info=True, **kwargs):
 
         log_error(logger, ex)
         log_error(__name__, 'this message will show on sentry')
+
+    慢的 handler (如 Sentry) 可以用 install_queue_logging 移到后台线程，log_error 只负责入队。
     """
     if isinstance(logger, str):
         logger = logging.getLogger(logger)
+    limiter = _error_limiter
+    if limiter is not None:
+        key = limiter.get_key(logger, message)
+        allowed, suppressed = limiter.acquire(key)
+        if suppressed:
+            _log_suppressed(logger, key, suppressed)
+        for due_key, due_suppressed in limiter.pop_due():
+            _log_suppressed(logging.getLogger(due_key[0]), due_key, due_suppressed)
+        if not allowed:
+            return
     if isinstance(message, Exception) or exc_info:
         logger.exception(message, *args, **kwargs)
     else:
@@ -140,14 +433,88 @@ def log_error(logger, message, *args, exc_info=True, **kwargs):
         logger.error(message, *args, extra={"stack": True}, **kwargs)
 
 
+# 定宽的日期指令: 指令 -> (宽度, datetime 构造参数的位置)
+_FIXED_WIDTH_DIRECTIVES = {"Y": (4, 0), "m": (2, 1), "d": (2, 2), "H": (2, 3), "M": (2, 4), "S": (2, 5)}
+
+
+@functools.lru_cache(maxsize=128)
+def _get_parse_plan(fmt):
+    """把只含定宽指令的格式编译成切片计划，其余格式返回 None 交给 strptime。compile fixed width format to plan.
+
+    :rtype: (int, tuple, tuple) | None
+    """
+    literals, fields, position, index, seen = [], [], 0, 0, set()
+    while index < len(fmt):
+        char = fmt[index]
+        if char == "%":
+            directive = fmt[index + 1] if index + 1 < len(fmt) else ""
+            if directive == "%":
+                literals.append((position, "%"))
+                position += 1
+            elif directive in _FIXED_WIDTH_DIRECTIVES and directive not in seen:
+                seen.add(directive)
+                width, argument = _FIXED_WIDTH_DIRECTIVES[directive]
+                fields.append((position, position + width, argument))
+                position += width
+            else:
+                return None
+            index += 2
+        else:
+            literals.append((position, char))
+            position += 1
+            index += 1
+    return position, tuple(literals), tuple(fields)
+
+
+def _parse_with_plan(value, plan):
+    """按切片计划解析，不符合时返回 None"""
+    length, literals, fields = plan
+    if len(value) != length:
+        return None
+    for position, char in literals:
+        if value[position] != char:
+            return None
+    arguments = [1900, 1, 1, 0, 0, 0]
+    for start, end, argument in fields:
+        part = value[start:end]
+        if not part.isdecimal():
+            return None
+        arguments[argument] = int(part)
+    try:
+        return datetime.datetime(*arguments)
+    except ValueError:
+        return None
+
+
 def str_to_datetime(value, fmt="%Y-%m-%d %H:%M:%S"):
     """时间类型转换为字符串。datetime to string.
 
+    只含 %Y %m %d %H %M %S 的格式按固定位置切片解析，其他情况退回 strptime。
+
     :type value: str
     :type fmt: str
     :rtype: datetime.datetime
     """
-    return datetime.datetime.strptime(value, fmt)
+    plan = _get_parse_plan(fmt)
+    result = plan and _parse_with_plan(value, plan)
+    return result or datetime.datetime.strptime(value, fmt)
+
+
+def str_to_datetime_many(values, fmt="%Y-%m-%d %H:%M:%S"):
+    """批量把字符串转换为时间类型。parse strings to datetimes in batch.
+
+    Examples::
+
+        created_ats = str_to_datetime_many(row['created_at'] for row in csv.DictReader(f))
+
+    :type values: collections.Iterable[str]
+    :type fmt: str
+    :rtype: list[datetime.datetime]
+    """
+    plan, strptime = _get_parse_plan(fmt), datetime.datetime.strptime
+    if plan is None:
+        return [strptime(value, fmt) for value in values]
+    return [_parse_with_plan(value, plan) or strptime(value, fmt) for value in values]
 
 
 def str_to_date(value, fmt="%Y-%m-%d"):
@@ -157,14 +524,102 @@ def str_to_date(value, fmt="%Y-%m-%d"):
     :type fmt: str
     :rtype: datetime.date
     """
-    return datetime.datetime.strptime(value, fmt).date()
+    return str_to_datetime(value, fmt).date()
+
+
+class _LocalVar(threading.local):
+    """python 3.6 没有 contextvars 时的简化替代，作用域为线程"""
+
+    value = None
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        token, self.value = self.value, value
+        return token
+
+    def reset(self, token):
+        self.value = token
+
+
+_current_clock = ContextVar("hutils_clock", default=None) if ContextVar else _LocalVar()
+
+
+class Clock(contextlib.ContextDecorator):
+    """冻结"现在"的时钟，一次请求/任务内多次取时间结果一致。clock which freezes now once per unit of work.
+
+    Examples::
+
+        with Clock():
+            start, end = yesterday(), tomorrow()  # 基于同一个 now
+            today_start, today_end = get_clock().day_range()
+
+        @Clock(now=datetime.datetime(2018, 8, 8, 12))  # 测试中直接替换，无需 mock.patch
+        def test_something(self):
+            ...
+
+    :param now: 冻结的时间，不传则每次进入 (每次调用被装饰的函数) 后在第一次取时间时冻结
+    """
+
+    def __init__(self, now: Optional[datetime.datetime] = None):
+        self._explicit_now = now
+        self._now = now
+        self._tokens = []
+
+    def _recreate_cm(self):
+        """作为装饰器时每次调用用新的实例，各次调用 (以及各线程) 互不影响"""
+        return self.__class__(self._explicit_now)
+
+    def now(self) -> datetime.datetime:
+        if self._now is None:
+            self._now = datetime.datetime.now()
+        return self._now
+
+    def today(self) -> datetime.date:
+        return self.now().date()
+
+    def tomorrow(self) -> datetime.datetime:
+        return self.now() + datetime.timedelta(days=1)
+
+    def yesterday(self) -> datetime.datetime:
+        return self.now() - datetime.timedelta(days=1)
+
+    def day_range(self, delta_days: Optional[int] = None) -> Tuple[datetime.datetime, datetime.datetime]:
+        """今天 (或往前/后数天) 的起止时间，同 datetime_combine"""
+        return datetime_combine(self.today(), delta_days=delta_days)
+
+    def __enter__(self):
+        if not self._tokens:  # 重新进入同一个实例时重新冻结
+            self._now = self._explicit_now
+        self._tokens.append(_current_clock.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_clock.reset(self._tokens.pop())
+        return False
+
+
+class _SystemClock(Clock):
+    """不冻结的系统时钟，没有进入任何 Clock 时使用"""
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+
+_SYSTEM_CLOCK = _SystemClock()
+
+
+def get_clock() -> Clock:
+    """获取当前作用域的时钟，没有时返回系统时钟。get clock of current context, or system clock."""
+    return _current_clock.get() or _SYSTEM_CLOCK
 
 
 def tomorrow() -> datetime.datetime:
-    """获取昨天的时间"""
-    return datetime.datetime.now() + datetime.timedelta(days=1)
+    """获取明天的时间"""
+    return get_clock().tomorrow()
 
 
 def yesterday() -> datetime.datetime:
     """获取昨天的时间"""
-    return datetime.datetime.now() - datetime.timedelta(days=1)
+    return get_clock().yesterday()
@@ -7,7 +7,7 @@ from collections.abc import Callable
 from http import HTTPStatus, client
 from unittest import mock
 
-from hutils.shortcuts import str_to_datetime
+from hutils.shortcuts import Clock, str_to_datetime
 
 
 def disable_migration():
@@ -135,6 +135,7 @@ class Mogician:
 
     def __init__(self, fake_to):
         self.the_datetime = fake_to if isinstance(fake_to, datetime.datetime) else str_to_datetime(fake_to)
+        self.clock = Clock(self.the_datetime)
         self.patchers = [
             mock.patch("datetime.datetime", MockDateTime),
             mock.patch("time.localtime", lambda: time.struct_time(self.the_datetime.timetuple())),
@@ -153,12 +154,14 @@ class Mogician:
             pass
 
     def __enter__(self):
+        self.clock.__enter__()
         for patcher in self.patchers:
             patcher.start()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         for patcher in self.patchers:
             patcher.stop()
+        self.clock.__exit__(exc_type, exc_val, exc_tb)
 
 
 @contextlib.contextmanager
@@ -2,11 +2,125 @@
 #
 # this module provides various validators
 import re
-import uuid
 
 CHINESE_PHONE_REGEX = re.compile(r"^1[3-9][0-9]{9}$")
-SINGAPORE_PHONE_REGEX = re.compile(r"^[8|9]\d{7}$")
+SINGAPORE_PHONE_REGEX = re.compile(r"^[89]\d{7}$")
 CHINESE_TELEPHONE_REGEX = re.compile(r"^\d{3}-\d{7,8}|\d{4}-\d{7,8}$")
+# 两个分支互斥，完整匹配其中之一等价于 is_telephone 原先的 match + group 判断
+CHINESE_TELEPHONE_FULL_REGEX = re.compile(r"\d{3,4}-\d{7,8}")
+UUID_HEX_REGEX = re.compile(r"[0-9a-f]{32}")
+# 奇数个反斜杠后跟数字，或者 (?(数字)...) 条件分组
+_NUMBERED_REFERENCE_REGEX = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d")
+
+
+class PhoneRules:
+    """各地区手机号规则的注册表，所有规则编译成一个带命名分组的正则，一次匹配即可得出地区。
+    registry of regional phone number rules, compiled into one regex with named groups.
+
+    Examples::
+
+        PHONE_RULES.register('HK', r'[5-9]\\d{7}', prefixes=('5', '6', '7', '8', '9'), lengths=(8,))
+        PHONE_RULES.get_region('91234567')
+        # 'SG' (先注册的规则优先)
+
+    - pattern 不需要 ^$，按整个字符串匹配
+    - prefixes/lengths 用于在正则之前快速排除，不传则不限制
+    """
+
+    def __init__(self):
+        self._rules = {}  # region -> (prefixes, lengths, compiled pattern)
+        self._compiled = self._compile(self._rules)
+
+    def register(self, region, pattern, prefixes=(), lengths=()):
+        """注册或覆盖一个地区的规则，规则不合法或与已有规则冲突时抛 ValueError，已有规则不受影响
+
+        - 规则会被包进以 region 命名的分组，所以不能使用数字反向引用 (\\1, (?(1)...))，
+          命名分组也不能与其他规则或 region 重名
+
+        :type region: str
+        :type pattern: str
+        :type prefixes: tuple[str]
+        :type lengths: tuple[int]
+        """
+        if not region.isidentifier():
+            raise ValueError("region {!r} should be a valid identifier".format(region))
+        if _NUMBERED_REFERENCE_REGEX.search(pattern):
+            raise ValueError("pattern {!r} of {} should not use numbered backreferences".format(pattern, region))
+        try:
+            rule = (tuple(prefixes), frozenset(lengths), re.compile(pattern))
+            rules = {**self._rules, region: rule}
+            compiled = self._compile(rules)
+        except re.error as ex:
+            raise ValueError("pattern {!r} of {} is invalid: {}".format(pattern, region, ex)) from None
+        self._rules, self._compiled = rules, compiled
+
+    def unregister(self, region):
+        rules = dict(self._rules)
+        del rules[region]
+        self._rules, self._compiled = rules, self._compile(rules)
+
+    @property
+    def regions(self):
+        return tuple(self._rules)
+
+    @staticmethod
+    def _compile(rules):
+        """合并所有规则: (所有前缀, 所有长度, 合并后的正则)，任一规则不限制时对应的预检查就关闭"""
+        values = rules.values()
+        prefixes = () if any(not _[0] for _ in values) else tuple(p for _ in values for p in _[0])
+        lengths = frozenset() if any(not _[1] for _ in values) else frozenset(n for _ in values for n in _[1])
+        regex = re.compile(
+            "|".join("(?P<{}>{})".format(region, rule[2].pattern) for region, rule in rules.items()) or "(?!)"
+        )
+        return prefixes, lengths, regex
+
+    def get_region(self, string):
+        """一次匹配得出手机号所属地区，不合法时返回 None
+
+        :rtype: str | None
+        """
+        prefixes, lengths, regex = self._compiled
+        if (lengths and len(string) not in lengths) or (prefixes and not string.startswith(prefixes)):
+            return None
+        match = regex.fullmatch(string)
+        return match.lastgroup if match else None
+
+    def is_valid(self, string, region=None):
+        """检查手机号是否合法，指定 region 时只检查该地区的规则
+
+        :rtype: bool
+        """
+        if region is None:
+            return self.get_region(string) is not None
+        prefixes, lengths, regex = self._rules[region]
+        if (lengths and len(string) not in lengths) or (prefixes and not string.startswith(prefixes)):
+            return False
+        return regex.fullmatch(string) is not None
+
+    def validate_many(self, values, region=None):
+        """批量检查，非字符串一律不合法
+
+        :rtype: bytearray
+        """
+        if region is None:
+            prefixes, lengths, regex = self._compiled
+        else:
+            prefixes, lengths, regex = self._rules[region]
+        matches = regex.fullmatch
+        return bytearray(
+            [
+                value.__class__ is str
+                and (not lengths or len(value) in lengths)
+                and (not prefixes or value.startswith(prefixes))
+                and matches(value) is not None
+                for value in values
+            ]
+        )
+
+
+PHONE_RULES = PhoneRules()
+PHONE_RULES.register("CN", CHINESE_PHONE_REGEX.pattern.strip("^$"), prefixes=("1",), lengths=(11,))
+PHONE_RULES.register("SG", SINGAPORE_PHONE_REGEX.pattern.strip("^$"), prefixes=("8", "9"), lengths=(8,))
 
 
 def is_uuid(string):
@@ -18,10 +132,7 @@ def is_uuid(string):
 
     :rtype: bool
     """
-    try:
-        return bool(string and uuid.UUID(string).hex == string)
-    except ValueError:
-        return False
+    return bool(string) and len(string) == 32 and bool(UUID_HEX_REGEX.fullmatch(string))
 
 
 def is_int(string):
@@ -49,7 +160,7 @@ def is_chinese_phone(string):
 
     :rtype: bool
     """
-    return bool(CHINESE_PHONE_REGEX.match(string))
+    return PHONE_RULES.is_valid(string, "CN")
 
 
 def is_singapore_phone(string):
@@ -61,7 +172,7 @@ def is_singapore_phone(string):
 
     :rtype: bool
     """
-    return bool(SINGAPORE_PHONE_REGEX.match(string))
+    return PHONE_RULES.is_valid(string, "SG")
 
 
 def is_phone(string):
@@ -73,7 +184,20 @@ def is_phone(string):
 
     :rtype: bool
     """
-    return any([is_chinese_phone(string), is_singapore_phone(string)])
+    return PHONE_RULES.get_region(string) is not None
+
+
+def get_phone_region(string):
+    """获取手机号所属地区，不合法时返回 None。get region of phone number.
+
+    Examples::
+
+        get_phone_region('17600001234')
+        # 'CN'
+
+    :rtype: str | None
+    """
+    return PHONE_RULES.get_region(string)
 
 
 def is_telephone(string):
@@ -83,4 +207,40 @@ def is_telephone(string):
 
     :rtype: bool
     """
-    return bool(CHINESE_TELEPHONE_REGEX.match(string)) and CHINESE_TELEPHONE_REGEX.match(string).group() == string
+    return bool(CHINESE_TELEPHONE_FULL_REGEX.fullmatch(string))
+
+
+# kind -> (编译后的正则, 最短长度, 最长长度)，长度预检查在正则之前过滤掉明显不合法的值
+_VALIDATION_KINDS = {
+    "telephone": (CHINESE_TELEPHONE_FULL_REGEX, 11, 13),
+    "uuid": (UUID_HEX_REGEX, 32, 32),
+}
+# 手机号交给 PHONE_RULES，kind -> region
+_PHONE_KINDS = {"phone": None, "chinese_phone": "CN", "singapore_phone": "SG"}
+
+
+def validate_many(values, kind):
+    """批量校验，结果与对应的 is_* 函数一致。validate values in batch.
+
+    Examples::
+
+        result = validate_many(phones, 'phone')
+        valid_phones = [phone for phone, ok in zip(phones, result) if ok]
+        mask = numpy.frombuffer(result, dtype=bool)
+
+    :param kind: chinese_phone/singapore_phone/phone/telephone/uuid
+    :return: 每个值一个字节，1 为合法，0 为不合法 (非字符串一律不合法)
+    :rtype: bytearray
+    """
+    if kind in _PHONE_KINDS:
+        return PHONE_RULES.validate_many(values, _PHONE_KINDS[kind])
+    if kind not in _VALIDATION_KINDS:
+        raise ValueError("Unknown kind {!r}, choices are {}".format(kind, sorted({*_VALIDATION_KINDS, *_PHONE_KINDS})))
+    regex, min_length, max_length = _VALIDATION_KINDS[kind]
+    matches = regex.fullmatch
+    return bytearray(
+        [
+            value.__class__ is str and min_length <= len(value) <= max_length and matches(value) is not None
+            for value in values
+        ]
+    )
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import hutils
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class Genders(hutils.TupleEnum):
+    UNKNOWN = 0, "未知"
+    MALE = 1, "男性", {"code": "M"}
+    FEMALE = 2, "女性", {"code": "F"}
+    WOMAN = 2, "女"  # alias of FEMALE
+
+
+class TupleEnumTests(unittest.TestCase):
+    def test_values(self):
+        self.assertEqual(Genders.values(), (0, 1, 2))
+        self.assertIs(Genders.values(), Genders.values())
+        self.assertEqual(Genders.MALE.get_value_at(1), "男性")
+        self.assertEqual(Genders.MALE.get_value_at(-1), {"code": "M"})
+        self.assertIsNone(Genders.UNKNOWN.get_value_at(2))
+        self.assertEqual(Genders.FEMALE.get_value_from(2, "code"), "F")
+
+    def test_choices(self):
+        choices = [(0, "未知"), (1, "男性"), (2, "女性")]
+        self.assertListEqual(Genders.chinese_choices(), choices)
+        self.assertDictEqual(Genders.chinese_items(), dict(choices))
+        Genders.chinese_choices().append((3, "其他"))
+        Genders.chinese_items()[3] = "其他"
+        self.assertListEqual(Genders.chinese_choices(), choices)
+        self.assertDictEqual(Genders.chinese_items(), dict(choices))
+
+    def test_from_lower(self):
+        self.assertIs(Genders.from_lower("male"), Genders.MALE)
+        self.assertIs(Genders.from_lower("Female"), Genders.FEMALE)
+        with self.assertRaisesRegex(ValueError, "'WOMAN' is not a valid Genders"):
+            Genders.from_lower("woman")
+
+    def test_from_chinese(self):
+        self.assertIs(Genders.from_chinese("男性"), Genders.MALE)
+        with self.assertRaises(ValueError):
+            Genders.from_chinese("女")
+        with self.assertRaises(ValueError):
+            Genders.from_chinese([])
+
+    def test_unhashable_payload(self):
+        class Settings(hutils.TupleEnum):
+            A = "a", {"x": 1}
+
+        self.assertEqual(Settings.values(), ("a",))
+        self.assertEqual(Settings.chinese_choices(), [("a", {"x": 1})])
+        with self.assertRaises(ValueError):
+            Settings.from_chinese({"x": 1})
+
+    def test_indexes_per_class(self):
+        class Colors(hutils.TupleEnum):
+            RED = "red", "红"
+
+        self.assertEqual(Colors.values(), ("red",))
+        self.assertEqual(Genders.values(), (0, 1, 2))
+        self.assertNotIn("_tuple_enum_indexes", hutils.TupleEnum.__dict__)
+
+    def test_fields(self):
+        class Channels(hutils.TupleEnum):
+            __fields__ = "value", "chinese", "code"
+            WECHAT = 1, "微信", "wx"
+            ALIPAY = 2, "支付宝"
+
+        self.assertEqual(Channels.WECHAT.obj_values, (1, "微信", "wx"))
+        self.assertEqual(Channels.WECHAT.code, "wx")
+        self.assertIsNone(Channels.ALIPAY.code)
+        self.assertEqual(Channels.ALIPAY.chinese, "支付宝")
+        self.assertEqual(Channels.ALIPAY.value, 2)
+        self.assertNotIn("code", Channels.__members__)
+        self.assertFalse(hasattr(Genders.MALE, "code"))
+
+    def test_fields_conflicts(self):
+        conflicts = [
+            ("value", "the code"),
+            ("value", "name"),
+            ("code", "value"),
+            ("value", "obj_values"),
+            ("value", "lower_name"),
+            ("value", "values"),
+            ("value", "A"),
+        ]
+        for fields in conflicts:
+            with self.assertRaises(ValueError, msg=fields):
+
+                class Broken(hutils.TupleEnum):
+                    __fields__ = fields
+                    A = 1, "a"
+
+        class Renamed(hutils.TupleEnum):
+            __fields__ = "value", "code", "chinese"
+            A = 1, "a", "甲"
+
+        self.assertEqual(("a", "甲"), (Renamed.A.code, Renamed.A.chinese))
+        self.assertIs(Renamed.from_lower("a"), Renamed.A)
+
+    def test_fields_mixin(self):
+        # 与 hutils.django.apis.Errors 相同的用法
+        class Errors(hutils.TupleFieldsMixin):
+            __fields__ = "value", "code"
+
+            def message(self, **kwargs):
+                return self.value.format(**kwargs)
+
+        class UserErrors(Errors):
+            NOT_FOUND = "用户 {uid} 不存在", 404
+            DISABLED = "用户已禁用"
+
+        self.assertEqual(404, UserErrors.NOT_FOUND.code)
+        self.assertIsNone(UserErrors.DISABLED.code)
+        self.assertEqual(("用户已禁用",), UserErrors.DISABLED.obj_values)
+        self.assertEqual("用户 1 不存在", UserErrors.NOT_FOUND.message(uid=1))
+        self.assertIs(UserErrors("用户已禁用"), UserErrors.DISABLED)
+        self.assertIsInstance(UserErrors.DISABLED, hutils.TupleFieldsMixin)
+
+    def test_decode_many(self):
+        self.assertListEqual(
+            Genders.decode_many([1, 2, Genders.UNKNOWN]), [Genders.MALE, Genders.FEMALE, Genders.UNKNOWN]
+        )
+        self.assertListEqual(Genders.decode_many(iter([2])), [Genders.FEMALE])
+        with self.assertRaisesRegex(ValueError, "9 is not a valid Genders"):
+            Genders.decode_many([1, 9])
+        self.assertListEqual(Genders.decode_many([1, 9, []], unknown="default"), [Genders.MALE, None, None])
+        self.assertListEqual(Genders.decode_many([9], unknown="default", default=Genders.UNKNOWN), [Genders.UNKNOWN])
+        self.assertListEqual(Genders.decode_many([1, "1"], unknown="keep"), [Genders.MALE, "1"])
+        with self.assertRaises(ValueError):
+            Genders.decode_many([1], unknown="ignore")
+
+    def test_labels_and_encode_many(self):
+        self.assertListEqual(Genders.labels_for([1, Genders.FEMALE]), ["男性", "女性"])
+        self.assertListEqual(Genders.labels_for([3], unknown="default", default="-"), ["-"])
+        self.assertListEqual(Genders.encode_many([Genders.MALE, 2, Genders.WOMAN]), [1, 2, 2])
+        with self.assertRaises(ValueError):
+            Genders.encode_many(["MALE"])
+
+    def test_many_with_odd_labels(self):
+        class Label(str):
+            def __eq__(self, other):
+                raise AssertionError("labels should not be compared")
+
+            __hash__ = str.__hash__
+
+        class Sizes(hutils.TupleEnum):
+            SMALL = "s", Label("小")
+
+        self.assertListEqual(["小"], [str(_) for _ in Sizes.labels_for(["s"])])
+        labels = Sizes.labels_for(["s", "x"], unknown="default", default="-")
+        self.assertListEqual(["小", "-"], [str(_) for _ in labels])
+        self.assertIs(Sizes._get_indexes().labels, Sizes._get_indexes().labels)
+
+    @unittest.skipUnless(numpy, "should have numpy installed")
+    def test_many_as_array(self):
+        members = Genders.decode_many([0, 1], as_array=True)
+        self.assertEqual(members.dtype, object)
+        self.assertListEqual(members.tolist(), [Genders.UNKNOWN, Genders.MALE])
+        self.assertListEqual(Genders.labels_for([0, 1], as_array=True).tolist(), ["未知", "男性"])
+        self.assertEqual(Genders.encode_many([Genders.MALE], as_array=True).dtype.kind, "i")
+        kept = Genders.decode_many([7, 8], unknown="keep", as_array=True)
+        self.assertEqual(kept.dtype, object)
+        self.assertListEqual([7, 8], kept.tolist())
@@ -1,18 +1,53 @@
 # -*- coding: utf-8 -*-
+import array
 import datetime
 import decimal
+import io
 import json
 import unittest
+import uuid
 
 try:
     import bson
 except ImportError:
     bson = None
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import hutils
 
 
 class TestDataTypes(unittest.TestCase):
+    def test_bytes_to_str(self):
+        self.assertIsNone(hutils.bytes_to_str(None))
+        self.assertEqual("强哥", hutils.bytes_to_str("强哥".encode()))
+        self.assertEqual("value", hutils.bytes_to_str(memoryview(b"value")))
+        self.assertEqual(["a", None, 1, ["b", ["c"]]], hutils.bytes_to_str([b"a", None, 1, (bytearray(b"b"), [b"c"])]))
+        self.assertEqual({"key": ["a", {"b": "c"}]}, hutils.bytes_to_str({b"key": [b"a", {b"b": b"c"}]}))
+        self.assertEqual("", hutils.bytes_to_str(b"\xff", encoding="ascii", errors="ignore"))
+
+        nested = b"deep"
+        for _ in range(10000):
+            nested = [nested]
+        result = hutils.bytes_to_str(nested)
+        for _ in range(10000):
+            result = result[0]
+        self.assertEqual("deep", result)
+
+    def test_iter_bytes_to_str(self):
+        values = hutils.iter_bytes_to_str(iter([b"a", [b"b"]]))
+        self.assertEqual("a", next(values))
+        self.assertEqual([["b"]], list(values))
+        self.assertEqual([["key", "value"]], list(hutils.iter_bytes_to_str({b"key": b"value"})))
+
     def test_get_data(self):
         test_cases = [
             ({}, False, [], []),
@@ -31,6 +66,59 @@ class TestDataTypes(unittest.TestCase):
         self.assertEqual(begin, "yesterday")
         self.assertEqual(end, "today")
 
+    def test_data_getter(self):
+        data = {"offset": "10", "user": {"uid": "x", "profile": None}}
+        self.assertTupleEqual(("10",), hutils.DataGetter("offset")(data))
+        self.assertTupleEqual((), hutils.DataGetter()(data))
+        self.assertTupleEqual(("10", {"uid": "x", "profile": None}), hutils.DataGetter("offset", "user")(data))
+        with self.assertRaises(KeyError):
+            hutils.DataGetter("offset", "limit")(data)
+
+        get_page = hutils.DataGetter("offset", "limit", defaults={"limit": 20}, types={"offset": int, "limit": int})
+        self.assertTupleEqual((10, 20), get_page(data))
+        with self.assertRaises(KeyError):
+            get_page({})
+
+        get_user = hutils.DataGetter("user.uid", "user.profile.name", "user.age", optional=True)
+        self.assertTupleEqual(("x", None, None), get_user(data))
+        with self.assertRaises(TypeError):
+            hutils.DataGetter("user.profile.name")(data)
+
+    def test_merge_dicts(self):
+        first, second = {"a": 1, "nested": {"x": [1], "y": 1}}, {"b": 2, "nested": {"x": [1, 2], "z": 3}}
+        self.assertDictEqual({"a": 1, "b": 2, "nested": {"x": [1, 2], "z": 3}}, hutils.merge_dicts(first, second))
+
+        deep = hutils.merge_dicts(first, second, deep=True)
+        self.assertDictEqual({"a": 1, "b": 2, "nested": {"x": [1, 2], "y": 1, "z": 3}}, deep)
+        deep["nested"]["x"].append(3)
+        self.assertDictEqual({"x": [1], "y": 1}, first["nested"])
+        self.assertDictEqual({"x": [1, 2], "z": 3}, second["nested"])
+        for strategy in ("replace", "append", "unique"):
+            only_first = hutils.merge_dicts(first, {"b": 2}, deep=True, list_strategy=strategy)
+            only_first["nested"]["x"].append(3)
+            self.assertListEqual([1], first["nested"]["x"])
+        self.assertListEqual(
+            [1, 1, 2], hutils.merge_dicts(first, second, deep=True, list_strategy="append")["nested"]["x"]
+        )
+        self.assertListEqual(
+            [1, 2], hutils.merge_dicts(first, second, deep=True, list_strategy="unique")["nested"]["x"]
+        )
+
+        view = hutils.merge_dicts(first, second, lazy=True)
+        self.assertEqual(2, view["b"])
+        self.assertEqual({"x": [1, 2], "z": 3}, view["nested"])
+        second["b"] = 3
+        self.assertEqual(3, view["b"])
+
+        merged = hutils.merge_dicts(first, {"c": 3}, inplace=True)
+        self.assertIs(first, merged)
+        self.assertEqual(3, first["c"])
+
+        with self.assertRaises(ValueError):
+            hutils.merge_dicts(first, lazy=True, deep=True)
+        with self.assertRaises(ValueError):
+            hutils.merge_dicts(first, deep=True, list_strategy="unknown")
+
     @unittest.skipUnless(bson, "should have bson installed")
     def test_format_json_with_pymongo(self):
         test_date = datetime.date(2006, 1, 2)
@@ -63,3 +151,147 @@ class TestDataTypes(unittest.TestCase):
         sorted_result = hutils.data_types.format_json(test_case, sort_keys=True)
         sorted_expected = json.dumps(expected, ensure_ascii=False, sort_keys=True)
         self.assertEqual(sorted_result, sorted_expected)
+
+    def test_format_json_with_extra_types(self):
+        class Genders(hutils.TupleEnum):
+            MALE = 1, "男性"
+
+        uid = uuid.uuid4()
+        data = [uid, Genders.MALE, {3}, frozenset(), b"bytes", bytearray(b"array"), memoryview("强哥".encode())]
+        expected = [str(uid), 1, [3], [], "bytes", "array", "强哥"]
+        self.assertListEqual(expected, json.loads(hutils.format_json(data)))
+        if orjson:
+            self.assertListEqual(expected, json.loads(hutils.format_json(data, backend="orjson")))
+
+    @unittest.skipUnless(numpy, "should have numpy installed")
+    def test_format_json_with_numpy(self):
+        data = {"scalar": numpy.int64(3), "float": numpy.float32(0.5), "array": numpy.arange(6).reshape(2, 3)}
+        expected = {"scalar": 3, "float": 0.5, "array": [[0, 1, 2], [3, 4, 5]]}
+        self.assertDictEqual(expected, json.loads(hutils.format_json(data)))
+        if orjson:
+            self.assertDictEqual(expected, json.loads(hutils.format_json(data, backend="orjson")))
+
+    def test_format_json_with_registered_types(self):
+        class Price(decimal.Decimal):
+            pass
+
+        class Token:
+            def __init__(self, key):
+                self.key = key
+
+        class SubToken(Token):
+            pass
+
+        class Encoder(hutils.JSONEncoder):
+            pass
+
+        Encoder.register(Token, lambda o: o.key)
+        values = [Price("3.14"), datetime.datetime(2006, 1, 2, 15, 4, 5)]
+        self.assertEqual('["3.14", "2006-01-02 15:04:05"]', hutils.format_json(values))
+        self.assertEqual('["a", "b"]', hutils.format_json([Token("a"), SubToken("b")], cls=Encoder))
+        with self.assertRaises(TypeError):
+            hutils.format_json(Token("a"))
+
+        # 子类直接覆盖 encoders 时，不能读到父类缓存的查找结果
+        class DirectEncoder(hutils.JSONEncoder):
+            encoders = {**hutils.JSONEncoder.encoders, Token: lambda o: o.key}
+
+        self.assertIsNone(hutils.JSONEncoder.get_encoder(SubToken))
+        self.assertEqual('"c"', hutils.format_json(SubToken("c"), cls=DirectEncoder))
+
+    @unittest.skipUnless(orjson, "should have orjson installed")
+    def test_format_json_backends_parity(self):
+        test_cases = [
+            {"chinese": "强哥", "nested": [{"decimal": decimal.Decimal("3.14")}, None, True, 1.5, -2]},
+            [datetime.date(2006, 1, 2), datetime.datetime(2006, 1, 2, 15, 4, 5), decimal.Decimal("0.010")],
+            {1: "non-str key", 2: 2**70},
+            "plain",
+        ]
+        for data in test_cases:
+            expected = hutils.format_json(data, backend="json")
+            for backend in ("orjson", "fast"):
+                result = hutils.format_json(data, backend=backend)
+                self.assertEqual(json.loads(expected), json.loads(result))
+            sorted_result = hutils.format_json(data, backend="orjson", sort_keys=True, indent=2)
+            self.assertEqual(hutils.format_json(data, sort_keys=True, indent=2), sorted_result)
+            ascii_result = hutils.format_json(data, backend="orjson", ensure_ascii=True)
+            self.assertEqual(hutils.format_json(data, ensure_ascii=True), ascii_result)
+        with self.assertRaises(TypeError):
+            hutils.format_json(object(), backend="orjson")
+
+        # 已知差异: 非有限浮点数 json 输出 NaN/Infinity，orjson 输出 null
+        non_finite = [float("nan"), float("inf"), -float("inf")]
+        self.assertEqual("[NaN, Infinity, -Infinity]", hutils.format_json(non_finite))
+        self.assertEqual("[null,null,null]", hutils.format_json(non_finite, backend="orjson"))
+        with self.assertRaises(ValueError):
+            hutils.format_json(non_finite, backend="orjson", allow_nan=False)
+
+    def test_set_json_backend(self):
+        previous = hutils.data_types.set_json_backend("fast")
+        try:
+            self.assertEqual('"强哥"', hutils.format_json("强哥"))
+        finally:
+            hutils.data_types.set_json_backend(previous)
+        with self.assertRaises(ValueError):
+            hutils.data_types.set_json_backend("unknown")
+
+    def test_iter_format_json(self):
+        data = [{"chinese": "强哥", "decimal": decimal.Decimal("3.14"), "date": datetime.date(2006, 1, 2)}] * 100
+        chunks = list(hutils.iter_format_json(data, chunk_size=256))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(hutils.format_json(data), "".join(chunks))
+
+    def test_write_json(self):
+        data = {"chinese": "强哥", "datetime": datetime.datetime(2006, 1, 2, 15, 4, 5)}
+        text_file, binary_file = io.StringIO(), io.BytesIO()
+        hutils.write_json(data, text_file)
+        hutils.write_json(data, binary_file)
+        self.assertEqual(hutils.format_json(data), text_file.getvalue())
+        self.assertEqual(hutils.format_json(data).encode(), binary_file.getvalue())
+
+        class Socket:
+            def __init__(self):
+                self.sent = []
+
+            def sendall(self, chunk):
+                self.sent.append(chunk)
+
+        sock = Socket()
+        hutils.write_json(data, sock, chunk_size=8)
+        self.assertEqual(hutils.format_json(data).encode(), b"".join(sock.sent))
+
+    def test_normalize_many(self):
+        values = ["80.00", decimal.Decimal("12.30"), 6.66, 6, decimal.Decimal("1E+2"), "0.000", -1.50]
+        self.assertListEqual([hutils.normalize(_) for _ in values], hutils.normalize_many(values))
+        self.assertListEqual(["80", "12.3"], hutils.normalize_many(iter(["80.00", "12.30"])))
+
+    @unittest.skipUnless(numpy, "should have numpy installed")
+    def test_normalize_many_with_numpy(self):
+        self.assertListEqual(["1", "-2", "3"], hutils.normalize_many(numpy.array([1, -2, 3])))
+        self.assertListEqual(["1", "2.5", "3.25"], hutils.normalize_many(numpy.array([1.0, 2.50, 3.25])))
+
+    @unittest.skipUnless(numpy, "should have numpy installed")
+    def test_quantize_many_with_numpy(self):
+        expected = [decimal.Decimal("2.68"), decimal.Decimal("-0.13")]
+        for dtype in (numpy.float64, numpy.float32):
+            values = numpy.array([2.675, -0.125], dtype=dtype)
+            self.assertListEqual(expected, hutils.quantize_many(values, float_as_str=True))
+
+    def test_quantize_many(self):
+        values = [2.675, "1.005", 3, decimal.Decimal("7.125"), -0.125]
+        self.assertListEqual([hutils.quantize(_) for _ in values], hutils.quantize_many(values))
+        self.assertListEqual([hutils.quantize(_) for _ in values], hutils.quantize_many(iter(values)))
+        self.assertListEqual(
+            [decimal.Decimal("2.68"), decimal.Decimal("-0.13")],
+            hutils.quantize_many([2.675, -0.125], float_as_str=True),
+        )
+        self.assertListEqual(
+            [decimal.Decimal("1.234"), decimal.Decimal("1.234")],
+            hutils.quantize_many(array.array("d", [1.2345, 1.2349]), places=3, rounding=decimal.ROUND_DOWN),
+        )
+
+        class Float64(float):  # 同 numpy 2 的 float64
+            def __repr__(self):
+                return "np.float64({})".format(float.__repr__(self))
+
+        self.assertListEqual([decimal.Decimal("2.68")], hutils.quantize_many([Float64(2.675)], float_as_str=True))
@@ -21,3 +21,129 @@ class DateTimeTests(unittest.TestCase):
     def test_localtime(self):
         now = time.localtime()
         self.assertEqual(time.struct_time(datetime.datetime(2017, 1, 1, 8, 0, 0).timetuple()), now)
+
+    def test_str_to_datetime(self):
+        test_cases = [
+            ("2018-08-08 12:00:01", "%Y-%m-%d %H:%M:%S"),
+            ("2018-8-8 1:2:3", "%Y-%m-%d %H:%M:%S"),
+            ("2018-08-08  12:00:01", "%Y-%m-%d %H:%M:%S"),
+            ("20180808", "%Y%m%d"),
+            ("08/08/2018 10%", "%d/%m/%Y %H%%"),
+            ("Aug 08 2018", "%b %d %Y"),
+        ]
+        for value, fmt in test_cases:
+            self.assertEqual(datetime.datetime.strptime(value, fmt), hutils.str_to_datetime(value, fmt))
+        self.assertEqual(datetime.date(2018, 8, 8), hutils.str_to_date("2018-08-08"))
+        for value in ("2018-02-30 00:00:00", "2018-13-01 00:00:00", "abcd-01-01 00:00:00", "2018-01-01 00:00:60"):
+            with self.assertRaises(ValueError):
+                hutils.str_to_datetime(value)
+
+    def test_str_to_datetime_many(self):
+        values = ["2018-08-08 12:00:01", "2018-8-8 1:2:3"]
+        expected = [datetime.datetime(2018, 8, 8, 12, 0, 1), datetime.datetime(2018, 8, 8, 1, 2, 3)]
+        self.assertListEqual(expected, hutils.str_to_datetime_many(values))
+        self.assertListEqual([datetime.datetime(2018, 8, 1)], hutils.str_to_datetime_many(iter(["Aug 2018"]), "%b %Y"))
+        with self.assertRaises(ValueError):
+            hutils.str_to_datetime_many(["2018-08-08"])
+
+    def test_datetime_to_str(self):
+        value = datetime.datetime(2018, 8, 8, 1, 2, 3)
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%H%%", "%Y年%m月", "%b %d", "%S", "plain"):
+            self.assertEqual(value.strftime(fmt), hutils.datetime_to_str(value, fmt))
+            self.assertEqual(value.date().strftime(fmt), hutils.date_to_str(value.date(), fmt))
+        old_value = datetime.datetime(999, 1, 1)
+        self.assertEqual(old_value.strftime("%Y-%m-%d %H:%M:%S"), hutils.datetime_to_str(old_value))
+        for fmt in ("%H:%M", "%H:%M:%S", "plain"):
+            self.assertEqual(value.time().strftime(fmt), hutils.datetime_to_str(value.time(), fmt))
+
+    def test_datetimes_to_str(self):
+        values = [datetime.datetime(2018, 8, 8, 1, 2, 3), datetime.date(2018, 8, 9)]
+        self.assertListEqual(["2018-08-08", "2018-08-09"], hutils.datetimes_to_str(values, "%Y-%m-%d"))
+        self.assertListEqual(["2018-08-08 01:02:03"], hutils.datetimes_to_str(iter(values[:1])))
+
+    def test_datetime_ranges(self):
+        start, end = datetime.date(2018, 8, 30), datetime.date(2018, 10, 2)
+        days = list(hutils.datetime_ranges(start, end))
+        self.assertEqual(34, len(days))
+        self.assertEqual(hutils.datetime_combine(start), days[0])
+        self.assertEqual(hutils.datetime_combine(end), days[-1])
+
+        weeks = list(hutils.datetime_ranges(start, end, "week"))
+        self.assertEqual(hutils.datetime_combine(start, datetime.date(2018, 9, 2)), weeks[0])
+        self.assertEqual(hutils.datetime_combine(datetime.date(2018, 9, 3), datetime.date(2018, 9, 9)), weeks[1])
+        self.assertEqual(hutils.datetime_combine(datetime.date(2018, 10, 1), end), weeks[-1])
+
+        months = list(hutils.datetime_ranges(start, end, "month"))
+        self.assertListEqual(
+            [
+                hutils.datetime_combine(start, datetime.date(2018, 8, 31)),
+                hutils.datetime_combine(datetime.date(2018, 9, 1), datetime.date(2018, 9, 30)),
+                hutils.datetime_combine(datetime.date(2018, 10, 1), end),
+            ],
+            months,
+        )
+        self.assertEqual(12, len(list(hutils.datetime_ranges(start, end, 3))))
+        self.assertListEqual([], list(hutils.datetime_ranges(end, start)))
+        with self.assertRaises(ValueError):
+            hutils.datetime_ranges(start, end, "year")
+
+    def test_datetime_range_indexes(self):
+        ranges = list(hutils.datetime_ranges(datetime.date(2018, 8, 1), datetime.date(2018, 10, 31), "month"))
+        values = [
+            datetime.datetime(2018, 7, 31, 23, 59, 59),
+            datetime.datetime(2018, 8, 1),
+            datetime.datetime(2018, 8, 31, 23, 59, 59, 999999),
+            datetime.date(2018, 9, 1),
+            datetime.datetime(2018, 10, 31, 12),
+            datetime.datetime(2018, 11, 1),
+        ]
+        self.assertListEqual([None, 0, 0, 1, 2, None], hutils.datetime_range_indexes(values, ranges))
+
+    def test_clock(self):
+        with hutils.Clock() as clock:
+            now = clock.now()
+            self.assertIs(clock, hutils.get_clock())
+            self.assertEqual(now + datetime.timedelta(days=1), hutils.tomorrow())
+            self.assertEqual(now - datetime.timedelta(days=1), hutils.yesterday())
+            self.assertEqual(hutils.datetime_combine(now.date()), clock.day_range())
+            with hutils.Clock(datetime.datetime(2018, 8, 8, 12)):
+                self.assertEqual(datetime.datetime(2018, 8, 9, 12), hutils.tomorrow())
+                self.assertEqual(datetime.date(2018, 8, 8), hutils.get_clock().today())
+            self.assertEqual(now + datetime.timedelta(days=1), hutils.tomorrow())
+        self.assertIsNot(clock, hutils.get_clock())
+        self.assertGreater(hutils.tomorrow(), datetime.datetime.now())
+
+    def test_clock_refreezes_per_call(self):
+        @hutils.Clock()
+        def get_now():
+            now = hutils.get_clock().now()
+            self.assertEqual(now + datetime.timedelta(days=1), hutils.tomorrow())
+            return now
+
+        first = get_now()
+        time.sleep(0.01)
+        self.assertLess(first, get_now())
+
+        clock = hutils.Clock()
+        with clock:
+            first = clock.now()
+            with clock:
+                self.assertEqual(first, clock.now())
+        time.sleep(0.01)
+        with clock:
+            self.assertLess(first, clock.now())
+
+        fixed = hutils.Clock(datetime.datetime(2018, 8, 8, 12))
+        with fixed:
+            pass
+        with fixed:
+            self.assertEqual(datetime.datetime(2018, 8, 8, 12), fixed.now())
+
+    @hutils.Clock(datetime.datetime(2018, 8, 8, 12))
+    def test_clock_decorator(self):
+        self.assertEqual(datetime.datetime(2018, 8, 7, 12), hutils.yesterday())
+
+    @hutils.fake_time("2017-01-01 08:00:00")
+    def test_fake_time_clock(self):
+        self.assertEqual(datetime.datetime(2017, 1, 2, 8, 0, 0), hutils.tomorrow())
+        self.assertEqual(datetime.datetime(2017, 1, 1, 8, 0, 0), hutils.get_clock().now())
@@ -1,10 +1,22 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
+import pickle
+import threading
+import time
 import unittest
 
 import hutils
 
 
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
 class DecoratorTests(unittest.TestCase):
     def setUp(self):
         logging.disable(logging.CRITICAL)
@@ -37,3 +49,177 @@ class DecoratorTests(unittest.TestCase):
             value_error()
 
         self.assertTrue(True)
+
+    def test_async_context_manager(self):
+        async def value_error():
+            async with hutils.mutes(ValueError):
+                raise ValueError()
+            async with hutils.catches(ValueError, raises=IOError()):
+                raise ValueError()
+
+        with self.assertRaises(IOError):
+            run(value_error())
+
+    def test_async_decorator(self):
+        @hutils.mutes(ValueError, returns=42, logger=__name__)
+        async def mute_value_error():
+            raise ValueError()
+
+        @hutils.catches(ValueError, raises=lambda x: IOError(str(x)))
+        async def catch_value_error():
+            raise ValueError("should wrap this error")
+
+        self.assertEqual(42, run(mute_value_error()))
+        with self.assertRaises(IOError) as context:
+            run(catch_value_error())
+        self.assertEqual("should wrap this error", str(context.exception))
+        self.assertIsInstance(context.exception.__cause__, ValueError)
+
+    def test_decorator_reuse(self):
+        muted = hutils.mutes(ValueError, returns=42)
+        values = iter([1, ValueError()])
+
+        @muted
+        def next_value():
+            value = next(values)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        self.assertListEqual([1, 42], [next_value(), next_value()])
+        with self.assertRaises(StopIteration):
+            next_value()
+
+    def test_async_generator(self):
+        @hutils.mutes(ValueError, logger=__name__)
+        async def mute_value_error():
+            yield 1
+            received = yield 2
+            yield received
+            raise ValueError()
+
+        @hutils.catches(ValueError, raises=IOError())
+        async def catch_value_error():
+            yield 1
+            raise ValueError()
+
+        async def consume():
+            generator = mute_value_error()
+            items = [await generator.__anext__(), await generator.__anext__(), await generator.asend(3)]
+            items.extend([_ async for _ in generator])
+            self.assertListEqual([1, 2, 3], items)
+            with self.assertRaises(IOError):
+                async for item in catch_value_error():
+                    self.assertEqual(1, item)
+
+        run(consume())
+
+    def test_async_generator_athrow(self):
+        @hutils.mutes(ValueError)
+        async def recover_key_error():
+            while True:
+                try:
+                    yield 1
+                except KeyError:
+                    yield "recovered"
+                except TypeError:
+                    raise ValueError()
+
+        async def consume():
+            generator = recover_key_error()
+            self.assertEqual(1, await generator.__anext__())
+            self.assertEqual("recovered", await generator.athrow(KeyError()))
+            self.assertEqual(1, await generator.__anext__())
+            with self.assertRaises(StopAsyncIteration):
+                await generator.athrow(TypeError())
+            generator = recover_key_error()
+            await generator.__anext__()
+            with self.assertRaises(IndexError):
+                await generator.athrow(IndexError())
+
+        run(consume())
+
+    def test_memoize(self):
+        calls = []
+
+        @hutils.memoize(maxsize=2)
+        def double(value, extra=0):
+            calls.append(value)
+            return value * 2 + extra
+
+        self.assertListEqual([2, 2, 4, 7], [double(1), double(1), double(2), double(2, extra=3)])
+        self.assertEqual(2, double(1))
+        self.assertListEqual([1, 2, 2, 1], calls)
+        self.assertEqual(hutils.decorators.CacheInfo(hits=1, misses=4, stale=0, currsize=2), double.cache_info())
+        double.cache_clear()
+        self.assertEqual(hutils.decorators.CacheInfo(0, 0, 0, 0), double.cache_info())
+
+    def test_memoize_ttl_and_stale(self):
+        results = iter([1, IOError(), 3])
+
+        class DictBackend(dict):
+            def set(self, key, entry):
+                self[key] = entry
+
+        @hutils.memoize(ttl=60, backend=DictBackend(), stale_on=(IOError,), logger=__name__)
+        def refresh():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with hutils.fake_time("2018-08-08 12:00:00"):
+            self.assertEqual(1, refresh())
+        with hutils.fake_time("2018-08-08 12:00:59"):
+            self.assertEqual(1, refresh())
+        with hutils.fake_time("2018-08-08 12:01:01"):
+            self.assertEqual(1, refresh())
+            self.assertEqual(3, refresh())
+        self.assertEqual(hutils.decorators.CacheInfo(hits=1, misses=3, stale=1, currsize=1), refresh.cache_info())
+
+    def test_memoize_thundering_herd(self):
+        calls = []
+
+        @hutils.memoize()
+        def slow(value):
+            calls.append(value)
+            time.sleep(0.05)
+            return value
+
+        threads = [threading.Thread(target=slow, args=(1,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual([1], calls)
+        self.assertEqual(hutils.decorators.CacheInfo(hits=4, misses=1, stale=0, currsize=1), slow.cache_info())
+
+    def test_memoize_key_separates_kwargs(self):
+        @hutils.memoize()
+        def echo(*args, **kwargs):
+            return args, kwargs
+
+        self.assertEqual(((1,), {"a": 1}), echo(1, a=1))
+        self.assertEqual((((1,), (("a", 1),)), {}), echo((1,), (("a", 1),)))
+        self.assertEqual(((1, ("a", 1)), {}), echo(1, ("a", 1)))
+
+        key = hutils.decorators._make_key((1,), {"a": 1})
+        self.assertEqual(key, pickle.loads(pickle.dumps(key)))
+        self.assertIs(key[1], pickle.loads(pickle.dumps(key))[1])
+        self.assertEqual("(1, <kwargs>, ('a', 1))", repr(key))
+
+    def test_memoize_async(self):
+        calls = []
+
+        @hutils.memoize(ttl=60)
+        async def slow(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        async def gather():
+            return await asyncio.gather(*[slow(1) for _ in range(5)], slow(2))
+
+        self.assertListEqual([1, 1, 1, 1, 1, 2], run(gather()))
+        self.assertListEqual([1, 2], sorted(calls))  # python 3.6 的 gather 不保证任务的启动顺序
+        self.assertEqual(hutils.decorators.CacheInfo(hits=4, misses=2, stale=0, currsize=2), slow.cache_info())
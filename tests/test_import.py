@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 
+import subprocess
+import sys
 import unittest
 
 
@@ -9,3 +11,24 @@ class ImportTests(unittest.TestCase):
         import hutils
 
         self.assertTrue(hutils)
+
+    def test_import_all(self):
+        import hutils
+
+        for name in hutils.__all__:
+            self.assertTrue(getattr(hutils, name), name)
+        with self.assertRaises(AttributeError):
+            getattr(hutils, "not_exists")
+
+    @unittest.skipIf(sys.version_info < (3, 7), "lazy loading requires python 3.7+")
+    def test_import_time(self):
+        """import hutils 不应该引入任何可选依赖或较重的标准库模块"""
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import hutils"],
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        ).stderr
+        imported = {line.rsplit("|", 1)[-1].strip() for line in output.splitlines() if line.startswith("import time:")}
+        heavy_modules = {"bson", "django", "http.client", "numpy", "orjson", "pymongo", "rest_framework", "unittest"}
+        self.assertSetEqual(set(), imported & heavy_modules)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import logging
+import queue
+import time
+import unittest
+
+import hutils
+from hutils.logs import BoundedQueueHandler
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self, delay):
+        super(SlowHandler, self).__init__()
+        self.delay = delay
+        self.records = []
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.records.append(record)
+
+
+class LogsTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.NOTSET)
+        self.logger = logging.getLogger("hutils.tests.logs")
+        self.logger.propagate = False
+        self.handler = SlowHandler(0.05)
+        self.logger.handlers = [self.handler]
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.logger.propagate = True
+
+    def test_install_queue_logging(self):
+        listener = hutils.install_queue_logging(self.logger)
+        started_at = time.monotonic()
+        for _ in range(5):
+            try:
+                raise ValueError("slow handler")
+            except ValueError as ex:
+                hutils.log_error(self.logger, ex)
+        self.assertLess(time.monotonic() - started_at, 0.05 * 5)
+        listener.stop()
+        listener.stop()
+
+        self.assertListEqual([self.handler], self.logger.handlers)
+        self.assertEqual(5, len(self.handler.records))
+        self.assertIs(ValueError, self.handler.records[0].exc_info[0])
+        self.assertEqual("slow handler", self.handler.records[0].getMessage())
+
+    def test_install_queue_logging_per_logger(self):
+        parent, child = logging.getLogger("hutils.tests.queue"), logging.getLogger("hutils.tests.queue.child")
+        empty = logging.getLogger("hutils.tests.queue.empty")
+        parent_handler, child_handler = SlowHandler(0), SlowHandler(0)
+        parent.handlers, child.handlers = [parent_handler], [child_handler]
+        parent.propagate = False
+        try:
+            listener = hutils.install_queue_logging(parent, child, empty, child)
+            self.assertListEqual([parent, child], listener.loggers)
+            self.assertListEqual([], empty.handlers)
+            parent.warning("parent")
+            child.warning("child")
+            listener.stop()
+        finally:
+            parent.handlers, child.handlers = [], []
+            parent.propagate = True
+        self.assertListEqual(["parent", "child"], [_.getMessage() for _ in parent_handler.records])
+        self.assertListEqual(["child"], [_.getMessage() for _ in child_handler.records])
+        self.assertEqual(0, listener.dropped)
+
+    def test_overflow(self):
+        record = logging.makeLogRecord({"msg": "%s", "args": ("first",)})
+        handler = BoundedQueueHandler(queue.Queue(1))
+        handler.handle(record)
+        handler.handle(logging.makeLogRecord({"msg": "second"}))
+        self.assertEqual(1, handler.dropped)
+        self.assertEqual("first", handler.queue.get_nowait().msg)
+
+        handler = BoundedQueueHandler(queue.Queue(1), overflow="drop_oldest")
+        handler.handle(record)
+        handler.handle(logging.makeLogRecord({"msg": "second"}))
+        self.assertEqual(1, handler.dropped)
+        self.assertEqual("second", handler.queue.get_nowait().msg)
+
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(queue.Queue(1), overflow="unknown")
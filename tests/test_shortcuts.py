@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import logging
+import unittest
+
+import hutils
+
+
+class ShortcutsTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.NOTSET)
+
+    def test_list_get(self):
+        self.assertEqual(4, hutils.list_get([0, 1, 2], 3, 4))
+        self.assertEqual(2, hutils.list_get((0, 1, 2), -1))
+        self.assertEqual("b", hutils.list_get("abc", 1))
+        self.assertIsNone(hutils.list_get([], -1))
+
+    def test_list_get_iterator(self):
+        def numbers():
+            yield from range(3)
+            raise AssertionError("should not consume more than needed")
+
+        self.assertEqual(1, hutils.list_get(numbers(), 1))
+        self.assertEqual(2, hutils.list_get(iter(range(3)), -1))
+        self.assertEqual(0, hutils.list_get(iter(range(3)), -3))
+        self.assertEqual("x", hutils.list_get(iter(range(3)), -4, "x"))
+        self.assertEqual("x", hutils.list_get(iter(range(3)), 3, "x"))
+        self.assertEqual("a", hutils.list_get({"a": 1}, 0))
+
+    def test_list_first(self):
+        self.assertEqual(0, hutils.list_first(iter(range(3))))
+        self.assertEqual(0, hutils.list_first(_ for _ in range(10**12)))
+        self.assertIsNone(hutils.list_first([]))
+
+    def test_error_rate_limiter(self):
+        limiter = hutils.ErrorRateLimiter(rate=0, burst=2, summary_interval=0)
+        previous = hutils.set_error_limiter(limiter)
+        try:
+            with self.assertLogs("hutils.tests", level="WARNING") as logs:
+                for _ in range(5):
+                    try:
+                        raise ValueError("same error")
+                    except ValueError as ex:
+                        hutils.log_error("hutils.tests", ex)
+                hutils.log_error("hutils.tests", "other error", exc_info=False)
+        finally:
+            hutils.set_error_limiter(previous)
+        levels = [record.levelname for record in logs.records]
+        self.assertListEqual(["ERROR", "ERROR", "WARNING", "WARNING", "WARNING", "ERROR"], levels)
+        self.assertIn("suppressed 1 similar errors: ValueError at {}".format(__file__), logs.records[2].getMessage())
+
+    def test_error_rate_limiter_flush(self):
+        limiter = hutils.ErrorRateLimiter(rate=0, burst=1, summary_interval=3600)
+        key = ("hutils.tests", ValueError, None)
+        self.assertTupleEqual((True, 0), limiter.acquire(key))
+        self.assertTupleEqual((False, 0), limiter.acquire(key))
+        self.assertTupleEqual((False, 0), limiter.acquire(key))
+        with self.assertLogs("hutils.tests", level="WARNING"):
+            self.assertListEqual([(key, 2)], limiter.flush())
+        self.assertListEqual([], limiter.flush())
+
+    def test_error_rate_limiter_pop_due(self):
+        limiter = hutils.ErrorRateLimiter(rate=0, burst=1, summary_interval=60)
+        stopped, other = ("hutils.tests", ValueError, None), ("hutils.tests", KeyError, None)
+        limiter.acquire(stopped)
+        limiter.acquire(stopped)
+        self.assertListEqual([], limiter.pop_due())
+        for bucket in limiter._buckets.values():  # 假装已过了 summary_interval
+            bucket[3] -= 61
+        limiter._swept_at -= 61
+        previous = hutils.set_error_limiter(limiter)
+        try:
+            with self.assertLogs("hutils.tests", level="WARNING") as logs:
+                hutils.log_error("hutils.tests", KeyError("other"))
+        finally:
+            hutils.set_error_limiter(previous)
+        self.assertIn("suppressed 1 similar errors: ValueError", logs.output[0])
+        self.assertListEqual([], limiter.pop_due())
+        self.assertTupleEqual((False, 0), limiter.acquire(other))
+
+    def test_error_rate_limiter_with_decorators(self):
+        limiter = hutils.ErrorRateLimiter(rate=0, burst=1, summary_interval=3600)
+        previous = hutils.set_error_limiter(limiter)
+
+        @hutils.mutes(returns=42, logger="hutils.tests")
+        def fails():
+            raise ValueError("fails")
+
+        try:
+            with self.assertLogs("hutils.tests") as logs:
+                self.assertListEqual([42] * 3, [fails() for _ in range(3)])
+        finally:
+            hutils.set_error_limiter(previous)
+        self.assertEqual(1, len(logs.records))
+        with self.assertLogs("hutils.tests", level="WARNING") as logs:
+            self.assertListEqual([2], [suppressed for _, suppressed in limiter.flush()])
+        self.assertIn("suppressed 2 similar errors: ValueError at", logs.output[0])
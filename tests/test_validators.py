@@ -35,6 +35,45 @@ class ValidatorsTests(unittest.TestCase):
         self.assertTrue(hutils.is_phone("17600001234"))
         self.assertFalse(hutils.is_phone("+85212345678"))
 
+    def test_phone_regressions(self):
+        self.assertFalse(hutils.is_singapore_phone("|1234567"))
+        self.assertFalse(hutils.is_phone("17600001234\n"))
+
+    def test_get_phone_region(self):
+        self.assertEqual(hutils.get_phone_region("17600001234"), "CN")
+        self.assertEqual(hutils.get_phone_region("91234567"), "SG")
+        self.assertIsNone(hutils.get_phone_region("+85212345678"))
+        self.assertIsNone(hutils.get_phone_region(""))
+
+    def test_phone_rules_register(self):
+        rules = hutils.validators.PhoneRules()
+        self.assertIsNone(rules.get_region("91234567"))
+        rules.register("SG", r"[89]\d{7}", prefixes=("8", "9"), lengths=(8,))
+        rules.register("HK", r"[5-9]\d{7}")
+        self.assertEqual(rules.regions, ("SG", "HK"))
+        self.assertEqual(rules.get_region("91234567"), "SG")
+        self.assertEqual(rules.get_region("51234567"), "HK")
+        self.assertTrue(rules.is_valid("91234567", "HK"))
+        self.assertFalse(rules.is_valid("51234567", "SG"))
+        self.assertEqual(list(rules.validate_many(["51234567", "1", None])), [1, 0, 0])
+        self.assertEqual(list(rules.validate_many(["51234567", "91234567"], "SG")), [0, 1])
+        rules.unregister("HK")
+        self.assertIsNone(rules.get_region("51234567"))
+        with self.assertRaises(ValueError):
+            rules.register("+86", r"1\d{10}")
+
+    def test_phone_rules_reject_conflicts(self):
+        rules = hutils.validators.PhoneRules()
+        rules.register("SG", r"(?P<head>[89])\d{7}")
+        bad_patterns = [r"(\d)\1{7}", r"(1)?(?(1)\d{10}|\d{8})", r"(?P<head>1)\d{10}", r"(?P<SG>1)\d{10}", r"[1"]
+        for pattern in bad_patterns:
+            with self.assertRaises(ValueError):
+                rules.register("XX", pattern)
+        self.assertEqual(rules.regions, ("SG",))
+        self.assertEqual(rules.get_region("91234567"), "SG")
+        rules.register("LITERAL", r"\\1\d{3}")
+        self.assertEqual(rules.get_region("\\1234"), "LITERAL")
+
     def test_telephone_success(self):
         self.assertTrue(hutils.is_telephone("0510-85858999"))
 
@@ -65,3 +104,20 @@ class ValidatorsTests(unittest.TestCase):
     def test_telephone_too_long_end(self):
         telephone = "010-858589111"
         self.assertFalse(hutils.is_telephone(telephone))
+
+    def test_validate_many(self):
+        uid = uuid.uuid4().hex
+        values = ["17600001234", "91234567", "0510-85858999", uid, uid.upper(), "+85212345678", None, 17600001234]
+        test_cases = [
+            ("phone", hutils.is_phone, [1, 1, 0, 0, 0, 0, 0, 0]),
+            ("chinese_phone", hutils.is_chinese_phone, [1, 0, 0, 0, 0, 0, 0, 0]),
+            ("singapore_phone", hutils.is_singapore_phone, [0, 1, 0, 0, 0, 0, 0, 0]),
+            ("telephone", hutils.is_telephone, [0, 0, 1, 0, 0, 0, 0, 0]),
+            ("uuid", hutils.is_uuid, [0, 0, 0, 1, 0, 0, 0, 0]),
+        ]
+        for kind, validator, expected in test_cases:
+            result = hutils.validate_many(iter(values), kind)
+            self.assertEqual(bytearray(expected), result)
+            self.assertListEqual([validator(_) for _ in values[:6]], [bool(_) for _ in result[:6]])
+        with self.assertRaises(ValueError):
+            hutils.validate_many(values, "unknown")